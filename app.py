@@ -3,32 +3,50 @@
 Flask Web Application for Database Table Comparison - Enhanced with Table Management
 """
 
-from flask import Flask, render_template, request, jsonify, flash, redirect, url_for, session
+from flask import Flask, Response, render_template, request, jsonify, flash, redirect, url_for, session
 from flask_wtf import FlaskForm
-from wtforms import StringField, SelectField, FloatField, TextAreaField, FieldList, FormField, HiddenField, IntegerField
+from wtforms import StringField, FloatField, TextAreaField, FieldList, FormField, HiddenField, IntegerField
 from wtforms.validators import DataRequired, NumberRange, Optional
 import json
+import decimal
+import hashlib
 import logging
+import operator
 from datetime import datetime
 import threading
-import uuid
+import time
 import re
-from comparator import DatabaseTableComparator, DatabaseConfig, TablePairConfig, BatchComparisonResult
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from functools import cache
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from comparator import TablePairConfig
 
 # Import configuration
-from config import (DEV_DEFAULTS, PROD_DEFAULTS, COMPARISON_DEFAULTS, APP_CONFIG, SAMPLING_CONFIG,
+from config import (DEV_DEFAULTS, PROD_DEFAULTS, COMPARISON_DEFAULTS, APP_CONFIG, SAMPLING_CONFIG, BATCH_CONFIG,
                    load_available_tables, save_available_tables, add_table, 
-                   update_table, remove_table)
+                   update_table, remove_table, load_available_tables_with_etag)
 
 import os
-import webbrowser
 import secrets
+import signal
+import subprocess
+import sys
+
+try:
+    import orjson
+except Exception:  # pragma: no cover
+    orjson = None
 
 from storage import load_connection_settings, save_connection_settings, clear_connection_settings
 
 app = Flask(__name__)
 
 _SECRET_KEY_FILE = os.path.join('data', 'flask_secret_key.txt')
+# Reads of an existing but still empty key file (another process is writing it), 0.1s apart
+_SECRET_KEY_READ_ATTEMPTS = 20
 
 
 def _load_or_create_flask_secret_key() -> str:
@@ -45,59 +63,291 @@ def _load_or_create_flask_secret_key() -> str:
 
     os.makedirs(os.path.dirname(_SECRET_KEY_FILE), exist_ok=True)
 
+    new_secret = secrets.token_urlsafe(32)
     try:
-        with open(_SECRET_KEY_FILE, 'r', encoding='utf-8') as f:
-            file_secret = f.read().strip()
+        # Create the file atomically (owner-only) so concurrent starts agree on a single key
+        fd = os.open(_SECRET_KEY_FILE, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600)
+    except FileExistsError:
+        # Only the creator writes the key; it may still be writing, so wait briefly for it
+        for _ in range(_SECRET_KEY_READ_ATTEMPTS):
+            try:
+                with open(_SECRET_KEY_FILE, 'r', encoding='utf-8') as f:
+                    file_secret = f.read().strip()
+            except OSError:
+                break
             if file_secret:
                 return file_secret
-    except FileNotFoundError:
-        pass
-
-    new_secret = secrets.token_urlsafe(32)
-    try:
-        with open(_SECRET_KEY_FILE, 'w', encoding='utf-8') as f:
-            f.write(new_secret)
-        return new_secret
+            time.sleep(0.1)
+        fd = None
     except OSError:
-        logging.getLogger(__name__).warning(
-            'Could not persist Flask secret key to %s; using an ephemeral key for this run',
-            _SECRET_KEY_FILE,
-        )
-        return new_secret
+        fd = None
+
+    if fd is not None:
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(new_secret)
+            return new_secret
+        except OSError:
+            pass
+
+    logging.getLogger(__name__).warning(
+        'Could not persist Flask secret key to %s; using an ephemeral key for this run',
+        _SECRET_KEY_FILE,
+    )
+    return new_secret
 
 
 app.secret_key = _load_or_create_flask_secret_key()
 
 # Per-process instance id. Used to detect app restarts so we can clear transient UI state
 # (like last comparison table pairs) while keeping persisted Settings.
-_APP_INSTANCE_ID = str(uuid.uuid4())
+_APP_INSTANCE_ID = secrets.token_urlsafe(16)
+
+class _ExpiringStore:
+    """Thread-safe mapping bounded by entry count (LRU) and age (TTL).
+
+    `on_evict(key)` is called, outside the lock, for every entry dropped because the
+    store is full or the entry expired.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, on_evict=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self._data = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+
+    def _expire_locked(self, now):
+        evicted = []
+        while self._data:
+            key, (stored_at, _) = next(iter(self._data.items()))
+            if now - stored_at < self.ttl and len(self._data) <= self.maxsize:
+                break
+            self._data.popitem(last=False)
+            evicted.append(key)
+        return evicted
+
+    def _notify(self, evicted):
+        if self.on_evict:
+            for key in evicted:
+                self.on_evict(key)
+
+    def __setitem__(self, key, value):
+        now = time.monotonic()
+        with self._lock:
+            self._data[key] = (now, value)
+            self._data.move_to_end(key)
+            evicted = self._expire_locked(now)
+        self._notify(evicted)
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            expired = entry is not None and now - entry[0] >= self.ttl
+            if expired:
+                del self._data[key]
+            elif entry is not None:
+                self._data.move_to_end(key)
+        if expired:
+            self._notify([key])
+            return default
+        return default if entry is None else entry[1]
+
+    def __getitem__(self, key):
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        missing = object()
+        return self.get(key, missing) is not missing
+
+
+# Finished comparisons kept in memory. Each entry pins a full BatchComparisonResult
+# (differing rows included), so only the most recent ones are kept, for a limited time.
+_RESULTS_MAX_ENTRIES = APP_CONFIG.get('max_stored_results', 64)
+_RESULTS_TTL_SECONDS = APP_CONFIG.get('results_ttl_seconds', 3600)
+# Rows kept per result for display; totals are kept separately on the result
+_MAX_MISSING_ROWS_KEPT = 50
+_MAX_DIFFERING_ROWS_KEPT = 20
+
+
+def _forget_comparison(comparison_id):
+    """Drop the status of a comparison whose results were evicted."""
+    with _status_lock:
+        comparison_status.pop(comparison_id, None)
+        _status_changed.notify_all()
+    cancellation_requests.pop(comparison_id, None)
+    _comparison_futures.pop(comparison_id, None)
+
 
 # Global storage for comparison results
-comparison_results = {}
+comparison_results = _ExpiringStore(_RESULTS_MAX_ENTRIES, _RESULTS_TTL_SECONDS, on_evict=_forget_comparison)
+# Finished comparisons that stored no results (failed, or cancelled before any table finished).
+# Only their status entry remains, and it is dropped on the same count/age bounds as results.
+_finished_without_results = _ExpiringStore(_RESULTS_MAX_ENTRIES, _RESULTS_TTL_SECONDS,
+                                           on_evict=_forget_comparison)
 comparison_status = {}
 cancellation_requests = {}
 
+# Comparisons run on a bounded pool instead of one new thread per request; extra
+# submissions wait in the executor queue with a 'pending' status until a worker frees up.
+_COMPARISON_WORKERS = BATCH_CONFIG.get('max_concurrent_runs') or min(8, os.cpu_count() or 1)
+comparison_executor = ThreadPoolExecutor(max_workers=_COMPARISON_WORKERS, thread_name_prefix='comparison')
+# Future of each submitted comparison, used to cancel comparisons that have not started yet
+_comparison_futures = {}
+# Set once /shutdown is called; the lock keeps a submission from racing the executor shutdown
+_shutting_down = threading.Event()
+_submit_lock = threading.Lock()
+# How long /shutdown waits for running comparisons to notice the cancellation
+_SHUTDOWN_GRACE_SECONDS = APP_CONFIG.get('shutdown_grace_seconds', 30)
+
+
+def _comparison_finished(comparison_id):
+    """Done callback of a comparison's future (also run when it is cancelled before starting)."""
+    _comparison_futures.pop(comparison_id, None)
+    # Keep the status of runs without results bounded too
+    if comparison_id not in comparison_results:
+        _finished_without_results[comparison_id] = True
+
+# Status entries are immutable snapshots: writers build a new dict (copy-on-write) and swap
+# it in with a single assignment, so the status endpoints read them without locking and never
+# see a half-applied update. The lock only serializes writers (one per comparison worker);
+# every published snapshot is announced on _status_changed for the event streams.
+_status_lock = threading.Lock()
+_status_changed = threading.Condition(_status_lock)
+
+
+def _publish_status(comparison_id, fields=None, table_index=None, table_fields=None):
+    """Publish a new status snapshot with top-level and/or one table entry's fields replaced."""
+    with _status_lock:
+        old = comparison_status[comparison_id]
+        new = {**old, **fields} if fields else dict(old)
+        if table_index is not None:
+            table_list = list(old['table_list'])
+            table_list[table_index] = {**table_list[table_index], **table_fields}
+            new['table_list'] = table_list
+        comparison_status[comparison_id] = new
+        _status_changed.notify_all()
+
+
+def _replace_status(comparison_id, snapshot):
+    """Publish a whole new status snapshot for a comparison."""
+    with _status_lock:
+        comparison_status[comparison_id] = snapshot
+        _status_changed.notify_all()
+
+
+def _update_status(comparison_id, **fields):
+    """Apply top-level field updates to a comparison's status entry."""
+    _publish_status(comparison_id, fields)
+
+
+def _update_table_status(comparison_id, index, **fields):
+    """Apply field updates to a single entry of a comparison's table list."""
+    _publish_status(comparison_id, table_index=index, table_fields=fields)
+
+
+# Last comparison form state (table pairs, tolerance, row limit) per browser. Kept server-side
+# and keyed by a short random id stored in the session, so the signed cookie stays small no
+# matter how many table pairs are configured. Oldest entries are evicted first.
+_LAST_COMPARISON_MAX_ENTRIES = 512
+_last_comparison_by_sid = OrderedDict()
+_last_comparison_lock = threading.Lock()
+
+
+def _get_last_comparison():
+    """Return the last comparison form state saved for this browser session, if any."""
+    sid = session.get('sid')
+    if sid is None:
+        return None
+    with _last_comparison_lock:
+        data = _last_comparison_by_sid.get(sid)
+        if data is not None:
+            _last_comparison_by_sid.move_to_end(sid)
+        return data
+
+
+def _set_last_comparison(data: dict):
+    """Save the last comparison form state for this browser session."""
+    sid = session.setdefault('sid', secrets.token_urlsafe(8))
+    with _last_comparison_lock:
+        _last_comparison_by_sid[sid] = data
+        _last_comparison_by_sid.move_to_end(sid)
+        while len(_last_comparison_by_sid) > _LAST_COMPARISON_MAX_ENTRIES:
+            _last_comparison_by_sid.popitem(last=False)
+
+
+def _clear_last_comparison():
+    """Forget the last comparison form state for this browser session."""
+    sid = session.get('sid')
+    if sid is not None:
+        with _last_comparison_lock:
+            _last_comparison_by_sid.pop(sid, None)
+
+
 def _get_connection_settings() -> dict:
     # Persistent store (file + OS keyring). Safe to use across restarts.
     return load_connection_settings()
 
+
+def _get_connection_settings_view() -> dict:
+    """Saved connection settings with DEV/PROD defaults filled in, as shown on the Compare and Settings pages.
+
+    Rebuilt on each call: the settings file is re-parsed only when its mtime changes, and
+    tokens are read from the keyring, which other processes may have cleared.
+    """
+    saved = _get_connection_settings()
+    view = {}
+    for env, defaults in (('dev', DEV_DEFAULTS), ('prod', PROD_DEFAULTS)):
+        for field in ('host', 'port', 'database', 'token'):
+            view[f'{env}_{field}'] = saved.get(f'{env}_{field}', defaults[field])
+    return view
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def _json_default(obj):
+    """Serialize values the JSON encoders don't handle natively (as Flask's jsonify does)."""
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if hasattr(obj, 'item'):  # numpy scalars
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _dumps(obj):
+    """Serialize to JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_json_default,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_json_default)
+
+
+def _json(obj, status=200):
+    """Build a JSON response (faster replacement for jsonify on hot API endpoints)."""
+    return app.response_class(_dumps(obj), status=status, mimetype='application/json')
+
+
 @app.before_request
 def _clear_last_comparison_on_restart():
     """Ensure the Compare page starts empty after an app restart.
 
     Flask's default session is stored client-side (signed cookie), so values like
-    `last_comparison` may survive app restarts. We treat them as transient and
-    clear them when a new server instance starts.
+    `last_comparison_id` may survive app restarts. We treat them as transient and
+    clear them when a new server instance starts. The last comparison form state
+    itself lives in process memory and does not survive a restart anyway.
     """
     previous_instance = session.get('_app_instance_id')
     if previous_instance != _APP_INSTANCE_ID:
         session['_app_instance_id'] = _APP_INSTANCE_ID
-        session.pop('last_comparison', None)
+        _clear_last_comparison()
+        session.pop('last_comparison', None)  # Legacy cookie-stored form state
         session.pop('last_comparison_id', None)
 
 
@@ -106,8 +356,9 @@ class TablePairForm(FlaskForm):
     class Meta:
         csrf = False  # Disable CSRF for subforms
     
-    prod_table = SelectField('PROD Table', choices=[], validators=[Optional()])
-    dev_table = SelectField('DEV Table', choices=[], validators=[Optional()])
+    # Free-text table names: no per-pair choice lists to build or validate against
+    prod_table = StringField('PROD Table', validators=[Optional()])
+    dev_table = StringField('DEV Table', validators=[Optional()])
     display_name = StringField('Display Name', validators=[Optional()])
     primary_keys = StringField('Primary Keys (comma-separated)', validators=[Optional()])
     ignored_columns = TextAreaField('Ignored Columns (one per line)', render_kw={"rows": 4}, validators=[Optional()])
@@ -149,51 +400,58 @@ class ComparisonForm(FlaskForm):
     table_pairs_count = HiddenField('Table Pairs Count', default='1')
 
 
+# Matches dynamic table pair fields such as "table_pairs-3-prod_table"
+_PAIR_FIELD_RE = re.compile(r'^table_pairs-(\d+)-([a-z_]+)$')
+# Non-empty comma-separated token with surrounding whitespace excluded
+_CSV_TOKEN_RE = re.compile(r'[^,\s](?:[^,]*[^,\s])?')
+# Maps legacy newline separators in ignored columns onto the '|' separator
+_IGNORED_COLUMNS_TABLE = str.maketrans({'\n': '|', '\r': '|', '\t': ' '})
+
+
+_find_csv_tokens = _CSV_TOKEN_RE.findall
+
+
+def parse_filters(columns_csv: str, values_multiline: str) -> dict:
+    """Parse row filter inputs into {column: [values]}.
+
+    Values per column are separated by lines; each line holds the comma-separated values
+    for the column at the same position. Columns without values are left out.
+    """
+    # Blank lines are skipped; if there are not enough lines, the column has no values
+    lines = iter(line for line in values_multiline.splitlines() if line.strip())
+    pairs = ((col, _find_csv_tokens(next(lines, ''))) for col in _find_csv_tokens(columns_csv))
+    return {col: vals for col, vals in pairs if vals}
+
+
 def extract_table_pairs_from_request():
     """Extract table pairs data from request form data."""
     table_pairs = []
     
-    # Get all form keys that start with 'table_pairs-'
-    pair_indices = set()
-    for key in request.form.keys():
-        if key.startswith('table_pairs-') and '-' in key[12:]:  # Skip 'table_pairs-' prefix
-            try:
-                index = int(key.split('-')[1])
-                pair_indices.add(index)
-            except (IndexError, ValueError):
-                continue
+    # Group all 'table_pairs-<index>-<field>' values by pair index in a single pass
+    pair_fields = {}
+    for key, value in request.form.items():
+        match = _PAIR_FIELD_RE.match(key)
+        if match:
+            pair_fields.setdefault(int(match.group(1)), {})[match.group(2)] = value.strip()
     
     # Extract data for each pair
-    for index in sorted(pair_indices):
-        prod_table = request.form.get(f'table_pairs-{index}-prod_table', '').strip()
-        dev_table = request.form.get(f'table_pairs-{index}-dev_table', '').strip()
-        prod_primary_keys = request.form.get(f'table_pairs-{index}-prod_primary_keys', '').strip()
-        dev_primary_keys = request.form.get(f'table_pairs-{index}-dev_primary_keys', '').strip()
-        ignored_columns = request.form.get(f'table_pairs-{index}-ignored_columns', '').strip()
+    for index, fields in sorted(pair_fields.items()):
+        prod_table = fields.get('prod_table', '')
+        dev_table = fields.get('dev_table', '')
+        prod_primary_keys = fields.get('prod_primary_keys', '')
+        dev_primary_keys = fields.get('dev_primary_keys', '')
+        ignored_columns = fields.get('ignored_columns', '')
         # Row filters: comma-separated values per column name for each environment
-        prod_filter_columns = request.form.get(f'table_pairs-{index}-prod_filter_columns', '').strip()
-        prod_filter_values = request.form.get(f'table_pairs-{index}-prod_filter_values', '').strip()
-        dev_filter_columns = request.form.get(f'table_pairs-{index}-dev_filter_columns', '').strip()
-        dev_filter_values = request.form.get(f'table_pairs-{index}-dev_filter_values', '').strip()
-        ignore_prod_pks = request.form.get(f'table_pairs-{index}-ignore_prod_pks') == 'on'  # ADICIONAR
-        ignore_dev_pks = request.form.get(f'table_pairs-{index}-ignore_dev_pks') == 'on'    # ADICIONAR
+        prod_filter_columns = fields.get('prod_filter_columns', '')
+        prod_filter_values = fields.get('prod_filter_values', '')
+        dev_filter_columns = fields.get('dev_filter_columns', '')
+        dev_filter_values = fields.get('dev_filter_values', '')
+        ignore_prod_pks = fields.get('ignore_prod_pks') == 'on'  # ADICIONAR
+        ignore_dev_pks = fields.get('ignore_dev_pks') == 'on'    # ADICIONAR
         
         # Only add pairs that have both tables selected
         if prod_table and dev_table:
             # Parse row filters into dicts {column: [values]}
-            def parse_filters(columns_csv: str, values_multiline: str):
-                filters = {}
-                columns = [c.strip() for c in columns_csv.split(',') if c.strip()]
-                # Values per column separated by lines; each line is comma-separated values for the corresponding column
-                lines = [line.strip() for line in values_multiline.split('\n') if line.strip()]
-                for i, col in enumerate(columns):
-                    # Match line by index; if not enough lines, treat as empty
-                    line_values = lines[i] if i < len(lines) else ''
-                    vals = [v.strip() for v in line_values.split(',') if v.strip()]
-                    if vals:
-                        filters[col] = vals
-                return filters
-
             prod_row_filters = parse_filters(prod_filter_columns, prod_filter_values)
             dev_row_filters = parse_filters(dev_filter_columns, dev_filter_values)
 
@@ -216,8 +474,16 @@ def extract_table_pairs_from_request():
     return table_pairs
 
 
-def create_table_pair_configs(form_data, table_pairs_data) -> list[TablePairConfig]:
+@cache
+def _get_comparator_module():
+    """Import the comparator (pandas + Databricks connector) on first use, not at startup."""
+    import comparator
+    return comparator
+
+
+def create_table_pair_configs(form_data, table_pairs_data) -> list['TablePairConfig']:
     """Create table pair configurations based on form data."""
+    TablePairConfig = _get_comparator_module().TablePairConfig
     table_configs = []
     
     for pair_data in table_pairs_data:
@@ -226,8 +492,8 @@ def create_table_pair_configs(form_data, table_pairs_data) -> list[TablePairConf
             dev_primary_keys = [key.strip() for key in pair_data['dev_primary_keys'].split(',') if key.strip()]
             # Support both legacy newline-separated and new pipe-separated formats
             ignored_columns_raw = pair_data['ignored_columns'] or ''
-            normalized = re.sub(r"\s*\|\s*", "|", ignored_columns_raw.replace('\n', '|'))
-            ignored_columns = [col.strip() for col in normalized.split('|') if col.strip()]
+            normalized = ignored_columns_raw.translate(_IGNORED_COLUMNS_TABLE)
+            ignored_columns = [col for col in (c.strip() for c in normalized.split('|')) if col]
             
             # Ensure at least one primary key exists for each environment
             if not prod_primary_keys:
@@ -255,8 +521,15 @@ def create_table_pair_configs(form_data, table_pairs_data) -> list[TablePairConf
 def run_comparison_async(comparison_id, form_data, table_pairs_data):
     """Run comparison in background thread with cancellation support."""
     start_time = datetime.now()
+    # Durations use the monotonic perf counter; wall-clock times are only for display
+    start_counter = time.perf_counter()
     
     try:
+        comparator_module = _get_comparator_module()
+        DatabaseConfig = comparator_module.DatabaseConfig
+        DatabaseTableComparator = comparator_module.DatabaseTableComparator
+        BatchComparisonResult = comparator_module.BatchComparisonResult
+        
         # Initialize status with table list
         table_list = []
         for i, pair in enumerate(table_pairs_data):
@@ -273,15 +546,15 @@ def run_comparison_async(comparison_id, form_data, table_pairs_data):
                 'comparison_summary': None
             })
         
-        comparison_status[comparison_id] = {
-            'status': 'running', 
+        _replace_status(comparison_id, {
+            'status': 'running',
             'progress': 'Initializing...',
             'start_time': start_time.isoformat(),
             'table_list': table_list,
             'current_table_index': -1,
             'total_duration': 0,
             'can_cancel': True
-        }
+        })
         
         # Create database configurations
         dev_config = DatabaseConfig(
@@ -306,7 +579,7 @@ def run_comparison_async(comparison_id, form_data, table_pairs_data):
         if not table_configs:
             raise ValueError("No valid table pairs configured")
         
-        comparison_status[comparison_id]['progress'] = f'Starting comparison of {len(table_configs)} table pair(s)...'
+        _update_status(comparison_id, progress=f'Starting comparison of {len(table_configs)} table pair(s)...')
         
         # Create and run comparator with user-defined max rows
         comparator = DatabaseTableComparator(
@@ -316,172 +589,199 @@ def run_comparison_async(comparison_id, form_data, table_pairs_data):
             user_max_rows=form_data.get('max_rows_limit')
         )
         
-        results = []
+        # Collect every table's row count up front (one query per environment)
+        _update_status(comparison_id, progress='Fetching row counts...')
+        comparator.prefetch_row_counts(table_configs)
+        
+        total_tables = len(table_configs)
         successful_comparisons = 0
         failed_comparisons = 0
         identical_tables = 0
         different_tables = 0
         
-        # Process each table individually to track progress
-        for i, config in enumerate(table_configs):
-            # Check for cancellation request ANTES de processar cada tabela
-            if comparison_id in cancellation_requests:
-                logger.info(f"Comparison {comparison_id} cancelled by user at table {i+1}/{len(table_configs)}")
-                comparison_status[comparison_id]['status'] = 'cancelled'
-                comparison_status[comparison_id]['progress'] = f'Cancelled after processing {i} of {len(table_configs)} tables'
-                comparison_status[comparison_id]['can_cancel'] = False
-                break
-            
+        def compare_table(i, config):
+            """Compare one table pair and record its progress; returns (final_status, result)."""
             table_start_time = datetime.now()
+            table_start_counter = time.perf_counter()
             
-            # Update status for current table
-            comparison_status[comparison_id]['current_table_index'] = i
-            comparison_status[comparison_id]['table_list'][i]['status'] = 'running'
-            comparison_status[comparison_id]['table_list'][i]['start_time'] = table_start_time.isoformat()
-            comparison_status[comparison_id]['progress'] = f'Comparing table {i+1}/{len(table_configs)}: {config.display_name}'
+            # Update status for current table (table entry and progress in one snapshot)
+            _publish_status(
+                comparison_id,
+                {'current_table_index': i, 'progress': f'Comparing table {i+1}/{total_tables}: {config.display_name}'},
+                table_index=i,
+                table_fields={'status': 'running', 'start_time': table_start_time.isoformat()}
+            )
             
             try:
                 result = comparator.compare_single_pair(config)
+                # Only the first rows are ever shown; don't keep the full lists in memory
+                result.truncate_details(_MAX_MISSING_ROWS_KEPT, _MAX_DIFFERING_ROWS_KEPT)
+            except Exception as e:
+                table_duration = time.perf_counter() - table_start_counter
                 table_end_time = datetime.now()
-                table_duration = (table_end_time - table_start_time).total_seconds()
                 
-                # Determine final status based on comparison result
-                if result.error_message:
-                    final_status = 'error'
-                    status_detail = result.error_message
-                    failed_comparisons += 1
-                elif result.tables_identical:
-                    final_status = 'identical'
-                    status_detail = 'Tables are completely identical'
-                    successful_comparisons += 1
-                    identical_tables += 1
-                else:
-                    final_status = 'different'
-                    # Create detailed status message
-                    differences = []
-                    if result.schema_differences:
-                        differences.append(f"{len(result.schema_differences)} schema differences")
-                    if result.dev_row_count != result.prod_row_count:
-                        differences.append(f"Row count mismatch: DEV({result.dev_row_count:,}) vs PROD({result.prod_row_count:,})")
-                    if result.differing_rows:
-                        differences.append(f"{len(result.differing_rows)} differing rows")
-                    if result.missing_from_dev:
-                        differences.append(f"{len(result.missing_from_dev)} missing from DEV")
-                    if result.missing_from_prod:
-                        differences.append(f"{len(result.missing_from_prod)} missing from PROD")
-                    
-                    status_detail = "; ".join(differences) if differences else "Tables have differences"
-                    successful_comparisons += 1
-                    different_tables += 1
+                # Update table status with error
+                _update_table_status(
+                    comparison_id, i,
+                    status='error',
+                    end_time=table_end_time.isoformat(),
+                    duration=table_duration,
+                    status_detail=str(e)
+                )
+                logger.error(f"Comparison failed for {config.display_name}: {str(e)}")
+                return 'error', None
+            
+            table_duration = time.perf_counter() - table_start_counter
+            table_end_time = datetime.now()
+            
+            # Determine final status based on comparison result
+            if result.error_message:
+                final_status = 'error'
+                status_detail = result.error_message
+            elif result.tables_identical:
+                final_status = 'identical'
+                status_detail = 'Tables are completely identical'
+            else:
+                final_status = 'different'
+                # Create detailed status message
+                differences = []
+                if result.schema_differences:
+                    differences.append(f"{len(result.schema_differences)} schema differences")
+                if result.dev_row_count != result.prod_row_count:
+                    differences.append(f"Row count mismatch: DEV({result.dev_row_count:,}) vs PROD({result.prod_row_count:,})")
+                if result.differing_rows_count:
+                    differences.append(f"{result.differing_rows_count} differing rows")
+                if result.missing_from_dev_count:
+                    differences.append(f"{result.missing_from_dev_count} missing from DEV")
+                if result.missing_from_prod_count:
+                    differences.append(f"{result.missing_from_prod_count} missing from PROD")
                 
-                # Update table status
-                comparison_status[comparison_id]['table_list'][i]['status'] = final_status
-                comparison_status[comparison_id]['table_list'][i]['end_time'] = table_end_time.isoformat()
-                comparison_status[comparison_id]['table_list'][i]['duration'] = table_duration
-                comparison_status[comparison_id]['table_list'][i]['status_detail'] = status_detail
-                comparison_status[comparison_id]['table_list'][i]['comparison_summary'] = {
+                status_detail = "; ".join(differences) if differences else "Tables have differences"
+            
+            # Update table status
+            _update_table_status(
+                comparison_id, i,
+                status=final_status,
+                end_time=table_end_time.isoformat(),
+                duration=table_duration,
+                status_detail=status_detail,
+                comparison_summary={
                     'dev_row_count': result.dev_row_count,
                     'prod_row_count': result.prod_row_count,
                     'schema_differences_count': len(result.schema_differences) if result.schema_differences else 0,
-                    'differing_rows_count': len(result.differing_rows) if result.differing_rows else 0,
-                    'missing_from_dev_count': len(result.missing_from_dev) if result.missing_from_dev else 0,
-                    'missing_from_prod_count': len(result.missing_from_prod) if result.missing_from_prod else 0,
+                    'differing_rows_count': result.differing_rows_count,
+                    'missing_from_dev_count': result.missing_from_dev_count,
+                    'missing_from_prod_count': result.missing_from_prod_count,
                     'was_limited': result.was_limited
                 }
+            )
+            return final_status, result
+        
+        # Table pairs are independent and I/O-bound on the warehouses, so run them on a
+        # bounded pool. A single worker keeps the previous sequential behaviour.
+        max_workers = 1
+        if BATCH_CONFIG.get('enable_parallel_processing', False):
+            max_workers = max(1, min(BATCH_CONFIG.get('max_concurrent_comparisons', 3), len(table_configs)))
+        
+        results_by_index = {}
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            future_to_index = {executor.submit(compare_table, i, config): i
+                               for i, config in enumerate(table_configs)}
+            pending = set(future_to_index)
+            cancel_handled = False
+            cancel_requests = cancellation_requests
+            
+            while pending:
+                done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
                 
-                results.append(result)
-                        
-            except Exception as e:
-                table_end_time = datetime.now()
-                table_duration = (table_end_time - table_start_time).total_seconds()
-                
-                # Update table status with error
-                comparison_status[comparison_id]['table_list'][i]['status'] = 'error'
-                comparison_status[comparison_id]['table_list'][i]['end_time'] = table_end_time.isoformat()
-                comparison_status[comparison_id]['table_list'][i]['duration'] = table_duration
-                comparison_status[comparison_id]['table_list'][i]['status_detail'] = str(e)
+                for future in done:
+                    if future.cancelled():
+                        continue
+                    final_status, result = future.result()
+                    if final_status == 'error':
+                        failed_comparisons += 1
+                    else:
+                        successful_comparisons += 1
+                        if final_status == 'identical':
+                            identical_tables += 1
+                        else:
+                            different_tables += 1
+                    if result is not None:
+                        results_by_index[future_to_index[future]] = result
                 
-                failed_comparisons += 1
-                logger.error(f"Comparison failed for {config.display_name}: {str(e)}")
+                # Check for cancellation request: drop every pair that has not started yet
+                if not cancel_handled and comparison_id in cancel_requests:
+                    cancel_handled = True
+                    for future in pending:
+                        future.cancel()
+                    logger.info(f"Comparison {comparison_id} cancelled by user after "
+                                f"{len(results_by_index)}/{total_tables} tables")
+                    # Stay 'running' until in-flight pairs finish so the UI doesn't load partial results early
+                    _update_status(
+                        comparison_id,
+                        progress=f'Cancelling - waiting for {sum(not f.cancelled() for f in pending)} running table(s)',
+                        can_cancel=False
+                    )
+        finally:
+            executor.shutdown(wait=True)
+            comparator.close_connections()
+        
+        # Keep results in the order the pairs were configured
+        results = [results_by_index[i] for i in sorted(results_by_index)]
         
         # Create batch result (mesmo se foi cancelado)
-        total_duration = (datetime.now() - start_time).total_seconds()
+        total_duration = time.perf_counter() - start_counter
+        
+        was_cancelled = comparison_id in cancellation_requests
         
         # Criar resultado apenas com as tabelas que foram processadas
         if results:
-            if len(results) == 1 and len(table_configs) == 1:
-                batch_result = BatchComparisonResult(
-                    total_pairs=1,
-                    successful_comparisons=successful_comparisons,
-                    failed_comparisons=failed_comparisons,
-                    identical_tables=identical_tables,
-                    different_tables=different_tables,
-                    results=results,
-                    total_duration=total_duration,
-                    summary={
-                        'total_pairs': 1,
-                        'successful_comparisons': successful_comparisons,
-                        'failed_comparisons': failed_comparisons,
-                        'identical_tables': identical_tables,
-                        'different_tables': different_tables,
-                        'success_rate': (successful_comparisons / 1) * 100,
-                        'identical_rate': (identical_tables / successful_comparisons) * 100 if successful_comparisons > 0 else 0
-                    }
-                )
-            else:
-                # Para batch results, criar um resultado customizado
-                batch_result = BatchComparisonResult(
-                    total_pairs=len(results),
-                    successful_comparisons=successful_comparisons,
-                    failed_comparisons=failed_comparisons,
-                    identical_tables=identical_tables,
-                    different_tables=different_tables,
-                    results=results,
-                    total_duration=total_duration,
-                    summary={
-                        'total_pairs': len(results),
-                        'successful_comparisons': successful_comparisons,
-                        'failed_comparisons': failed_comparisons,
-                        'identical_tables': identical_tables,
-                        'different_tables': different_tables,
-                        'success_rate': (successful_comparisons / len(results)) * 100 if results else 0,
-                        'identical_rate': (identical_tables / successful_comparisons) * 100 if successful_comparisons > 0 else 0
-                    }
-                )
+            batch_result = BatchComparisonResult(
+                total_pairs=len(results),
+                successful_comparisons=successful_comparisons,
+                failed_comparisons=failed_comparisons,
+                identical_tables=identical_tables,
+                different_tables=different_tables,
+                results=results,
+                total_duration=total_duration
+            )
             
-            # Store results
-            comparison_results[comparison_id] = {
+            # Store results; they never change, so the API payload is serialized once here
+            stored = {
                 'result': batch_result,
                 'config': form_data,
                 'table_pairs': table_pairs_data,
                 'timestamp': datetime.now().isoformat(),
-                'was_cancelled': comparison_id in cancellation_requests  # ADICIONAR ESTA LINHA
+                'was_cancelled': was_cancelled  # ADICIONAR ESTA LINHA
             }
+            stored['payload_json'] = _dumps(_build_result_payload(stored))
+            comparison_results[comparison_id] = stored
         
         # Update final status
-        if comparison_id in cancellation_requests:
-            comparison_status[comparison_id]['status'] = 'cancelled'
-            comparison_status[comparison_id]['progress'] = f'Cancelled - {len(results)} of {len(table_configs)} tables processed'
+        if was_cancelled:
+            final_fields = {
+                'status': 'cancelled',
+                'progress': f'Cancelled - {len(results)} of {total_tables} tables processed'
+            }
             # Remove from cancellation requests
             cancellation_requests.pop(comparison_id, None)
         else:
-            comparison_status[comparison_id]['status'] = 'completed'
-            comparison_status[comparison_id]['progress'] = 'Comparison completed!'
+            final_fields = {'status': 'completed', 'progress': 'Comparison completed!'}
         
-        comparison_status[comparison_id]['total_duration'] = total_duration
-        comparison_status[comparison_id]['current_table_index'] = -1
-        comparison_status[comparison_id]['can_cancel'] = False
+        _update_status(comparison_id, total_duration=total_duration, current_table_index=-1, can_cancel=False,
+                       **final_fields)
         
     except Exception as e:
-        total_duration = (datetime.now() - start_time).total_seconds()
+        total_duration = time.perf_counter() - start_counter
         logger.error(f"Comparison failed: {str(e)}")
-        comparison_status[comparison_id] = {
+        _replace_status(comparison_id, {
             'status': 'error', 
             'progress': f'Error: {str(e)}',
             'total_duration': total_duration,
             'table_list': comparison_status.get(comparison_id, {}).get('table_list', []),
             'can_cancel': False
-        }
+        })
         # Remove from cancellation requests if exists
         cancellation_requests.pop(comparison_id, None)
 
@@ -498,20 +798,12 @@ def compare_page():
     form = ComparisonForm()
 
     # Load values from session if available (avoid persisting credentials in client-side session)
-    is_first_time = 'last_comparison' not in session
-    last_data = session.get('last_comparison', {})
-    connection_settings = _get_connection_settings()
-
+    last_data = _get_last_comparison()
+    is_first_time = last_data is None
+    last_data = last_data or {}
     # Prefer settings saved on server; otherwise fall back to environment defaults
-    form.dev_host.data = connection_settings.get('dev_host', DEV_DEFAULTS['host'])
-    form.dev_port.data = connection_settings.get('dev_port', DEV_DEFAULTS['port'])
-    form.dev_database.data = connection_settings.get('dev_database', DEV_DEFAULTS['database'])
-    form.dev_token.data = connection_settings.get('dev_token', DEV_DEFAULTS['token'])
-
-    form.prod_host.data = connection_settings.get('prod_host', PROD_DEFAULTS['host'])
-    form.prod_port.data = connection_settings.get('prod_port', PROD_DEFAULTS['port'])
-    form.prod_database.data = connection_settings.get('prod_database', PROD_DEFAULTS['database'])
-    form.prod_token.data = connection_settings.get('prod_token', PROD_DEFAULTS['token'])
+    for name, value in _get_connection_settings_view().items():
+        form[name].data = value
 
     # Apply user settings (float tolerance, max rows) from session if available
     user_settings = session.get('user_settings', {})
@@ -532,17 +824,38 @@ def compare_page():
     )
 
 
+# Serialized /api/tables body together with the catalog ETag it was built from: (etag, body)
+_tables_payload_cache = {'entry': None}
+
+
+def _conditional_response(response, etag):
+    """Tag a response with an ETag and answer 304 when the client's copy is current.
+
+    Browsers must revalidate on every request (no-cache) so changes (table edits, comparison
+    progress) show up immediately; unchanged content costs only a bodiless 304.
+    """
+    if etag:
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.make_conditional(request)
+    return response
+
+
 @app.route('/api/tables')
 def get_tables():
     """Get all available tables."""
-    tables = load_available_tables()
-    return jsonify([{
-        'table_name': table[0],
-        'display_name': table[1],
-        'prod_primary_keys': table[2],
-        'dev_primary_keys': table[3],
-        'ignored_columns': table[4]
-    } for table in tables])
+    tables, etag = load_available_tables_with_etag()
+    entry = _tables_payload_cache['entry']
+    if entry is None or etag is None or entry[0] != etag:
+        body = _dumps([{
+            'table_name': table[0],
+            'display_name': table[1],
+            'prod_primary_keys': table[2],
+            'dev_primary_keys': table[3],
+            'ignored_columns': table[4]
+        } for table in tables])
+        entry = _tables_payload_cache['entry'] = (etag, body)
+    return _conditional_response(app.response_class(entry[1], mimetype='application/json'), etag)
 
 @app.route('/api/tables', methods=['POST'])
 def add_new_table():
@@ -551,7 +864,7 @@ def add_new_table():
     
     required_fields = ['table_name', 'display_name', 'prod_primary_keys', 'dev_primary_keys', 'ignored_columns']
     if not all(field in data for field in required_fields):
-        return jsonify({'success': False, 'error': 'Missing required fields'}), 400
+        return _json({'success': False, 'error': 'Missing required fields'}, 400)
     
     success = add_table(
         data['table_name'],
@@ -562,9 +875,9 @@ def add_new_table():
     )
     
     if success:
-        return jsonify({'success': True, 'message': 'Table added successfully'})
+        return _json({'success': True, 'message': 'Table added successfully'})
     else:
-        return jsonify({'success': False, 'error': 'Table already exists'}), 400
+        return _json({'success': False, 'error': 'Table already exists'}, 400)
 
 @app.route('/api/tables/<table_name>', methods=['PUT'])
 def update_existing_table(table_name):
@@ -573,7 +886,7 @@ def update_existing_table(table_name):
     
     required_fields = ['table_name', 'display_name', 'prod_primary_keys', 'dev_primary_keys', 'ignored_columns']
     if not all(field in data for field in required_fields):
-        return jsonify({'success': False, 'error': 'Missing required fields'}), 400
+        return _json({'success': False, 'error': 'Missing required fields'}, 400)
     
     success = update_table(
         table_name,
@@ -585,9 +898,9 @@ def update_existing_table(table_name):
     )
     
     if success:
-        return jsonify({'success': True, 'message': 'Table updated successfully'})
+        return _json({'success': True, 'message': 'Table updated successfully'})
     else:
-        return jsonify({'success': False, 'error': 'Table not found'}), 404
+        return _json({'success': False, 'error': 'Table not found'}, 404)
 
 
 @app.route('/api/tables/<table_name>', methods=['DELETE'])
@@ -596,30 +909,52 @@ def delete_table(table_name):
     success = remove_table(table_name)
     
     if success:
-        return jsonify({'success': True, 'message': 'Table deleted successfully'})
+        return _json({'success': True, 'message': 'Table deleted successfully'})
     else:
-        return jsonify({'success': False, 'error': 'Table not found'}), 404
+        return _json({'success': False, 'error': 'Table not found'}, 404)
 
 
 @app.route('/api/table-suggestions/<table_name>')
 def get_table_suggestions(table_name):
     """Get suggestions for a specific table."""
-    tables = load_available_tables()
+    tables, etag = load_available_tables_with_etag()
     for table in tables:
         if table[0] == table_name:
-            return jsonify({
+            return _conditional_response(_json({
                 'display_name': table[1],
                 'prod_primary_keys': table[2],
                 'dev_primary_keys': table[3],
                 'ignored_columns': table[4]
-            })
+            }), etag)
     
-    return jsonify({
+    return _conditional_response(_json({
         'display_name': table_name.split('.')[-1] if '.' in table_name else table_name,
         'prod_primary_keys': 'id',
         'dev_primary_keys': 'id',
         'ignored_columns': COMPARISON_DEFAULTS['ignored_columns']
-    })
+    }), etag)
+
+
+_NEWLINE_TO_PIPE = str.maketrans({'\n': '|'})
+
+
+def normalize_ignored_cols(pairs):
+    """Return copies of the table pairs with ignored columns in pipe-separated form."""
+    normalized = []
+    for pair in pairs:
+        pair = dict(pair)
+        pair['ignored_columns'] = (pair.get('ignored_columns') or '').translate(_NEWLINE_TO_PIPE)
+        normalized.append(pair)
+    return normalized
+
+
+# Fields that must be set on the form or fall back to saved connection settings
+_REQUIRED_FIELDS = ('dev_host', 'dev_port', 'dev_database', 'dev_token',
+                    'prod_host', 'prod_port', 'prod_database', 'prod_token', 'float_tolerance')
+# Form fields passed to the background comparison (and kept with its results)
+_FORM_DATA_FIELDS = _REQUIRED_FIELDS + ('max_rows_limit',)
+# Validation messages shown at most for one submission
+_MAX_REPORTED_ERRORS = 20
 
 
 @app.route('/compare', methods=['POST'])
@@ -628,7 +963,8 @@ def compare():
     form = ComparisonForm()
 
     # If the user filled Settings, but Compare fields are empty, use server-stored values.
-    connection_settings = _get_connection_settings()
+    # Loaded only when needed: reading tokens from the OS keyring blocks the request.
+    connection_settings = None
     
     # Extract table pairs from request
     table_pairs_data = extract_table_pairs_from_request()
@@ -638,82 +974,78 @@ def compare():
     logger.info(f"Form validation: {form.validate()}")
     logger.info(f"Form errors: {form.errors}")
     
-    # Validate main form (excluding table pairs for now)
-    main_form_valid = True
-    required_fields = ['dev_host', 'dev_port', 'dev_database', 'dev_token', 
-                      'prod_host', 'prod_port', 'prod_database', 'prod_token', 'float_tolerance']
-    
-    for field_name in required_fields:
-        field = getattr(form, field_name)
+    # Validate main form (excluding table pairs for now); all problems are reported in one flash
+    errors = []
+    missing_labels = []
+    for field_name in _REQUIRED_FIELDS:
+        field = form[field_name]
         if not field.data:
+            if connection_settings is None:
+                connection_settings = _get_connection_settings()
             fallback = connection_settings.get(field_name)
             if fallback:
                 field.data = fallback
             else:
-                main_form_valid = False
-                flash(f'{field.label.text} is required', 'error')
+                missing_labels.append(field.label.text)
+    if missing_labels:
+        errors.append(f"{', '.join(missing_labels)} {'is' if len(missing_labels) == 1 else 'are'} required")
     
     # Validate max_rows_limit if provided
     if form.max_rows_limit.data is not None and form.max_rows_limit.data < 0:
-        main_form_valid = False
-        flash('Max Rows Limit must be a positive number or zero (0 = no limit)', 'error')
+        errors.append('Max Rows Limit must be a positive number or zero (0 = no limit)')
     
     # Validate table pairs
     if not table_pairs_data:
-        main_form_valid = False
-        flash('At least one table pair must be configured', 'error')
+        errors.append('At least one table pair must be configured')
     else:
         for i, pair in enumerate(table_pairs_data):
             if not pair['prod_table'] or not pair['dev_table']:
-                main_form_valid = False
-                flash(f'Table pair {i+1}: Both PROD and DEV tables must be selected', 'error')
+                errors.append(f'Table pair {i+1}: Both PROD and DEV tables must be selected')
             if not pair['prod_primary_keys']:
-                main_form_valid = False
-                flash(f'Table pair {i+1}: PROD primary keys are required', 'error')
+                errors.append(f'Table pair {i+1}: PROD primary keys are required')
             if not pair['dev_primary_keys']:
-                main_form_valid = False
-                flash(f'Table pair {i+1}: DEV primary keys are required', 'error')
+                errors.append(f'Table pair {i+1}: DEV primary keys are required')
+            if len(errors) >= _MAX_REPORTED_ERRORS:
+                break
+    
+    main_form_valid = not errors
+    if errors:
+        flash('\n'.join(errors[:_MAX_REPORTED_ERRORS]), 'error')
     
     if main_form_valid:
         # Generate unique comparison ID
-        comparison_id = str(uuid.uuid4())
+        comparison_id = secrets.token_urlsafe(16)
         
         # Save comparison ID to session
         session['last_comparison_id'] = comparison_id
         
         # Extract form data
-        form_data = {
-            'dev_host': form.dev_host.data,
-            'dev_port': form.dev_port.data,
-            'dev_database': form.dev_database.data,
-            'dev_token': form.dev_token.data,
-            'prod_host': form.prod_host.data,
-            'prod_port': form.prod_port.data,
-            'prod_database': form.prod_database.data,
-            'prod_token': form.prod_token.data,
-            'float_tolerance': form.float_tolerance.data,
-            'max_rows_limit': form.max_rows_limit.data  # ADICIONAR ESTA LINHA
-        }
-
-        # Save non-sensitive form data to session (do not persist credentials)
-        # Normalize ignored columns to pipe-separated in session persistence
-        def normalize_ignored_cols(pairs):
-            normalized = []
-            for p in pairs:
-                ic = (p.get('ignored_columns') or '').replace('\n','|')
-                normalized.append({**p, 'ignored_columns': ic})
-            return normalized
+        form_data = {name: form[name].data for name in _FORM_DATA_FIELDS}
 
-        session['last_comparison'] = {
+        # Save non-sensitive form data for this session (do not persist credentials)
+        _set_last_comparison({
             'float_tolerance': form.float_tolerance.data,
             'max_rows_limit': form.max_rows_limit.data,  # ADICIONAR ESTA LINHA
             'table_pairs': normalize_ignored_cols(table_pairs_data)
-        }
+        })
         
-        # Start comparison in background thread
-        thread = threading.Thread(target=run_comparison_async, args=(comparison_id, form_data, table_pairs_data))
-        thread.daemon = True
-        thread.start()
+        # Queue the comparison on the background pool
+        _replace_status(comparison_id, {
+            'status': 'pending',
+            'progress': 'Queued - waiting for a free worker...',
+            'start_time': None,
+            'table_list': [],
+            'current_table_index': -1,
+            'total_duration': 0,
+            'can_cancel': True
+        })
+        with _submit_lock:
+            if _shutting_down.is_set():
+                _forget_comparison(comparison_id)
+                return _json({'error': 'Server is shutting down; the comparison was not started'}, 503)
+            future = comparison_executor.submit(run_comparison_async, comparison_id, form_data, table_pairs_data)
+            _comparison_futures[comparison_id] = future
+        future.add_done_callback(lambda _: _comparison_finished(comparison_id))
         
         return redirect(url_for('results', comparison_id=comparison_id))
     
@@ -767,7 +1099,6 @@ def settings_page():
                 'prod_database': request.form.get('prod_database', ''),
                 'prod_token': request.form.get('prod_token', ''),
             })
-
             flash('Settings saved. These values will be used as defaults for new comparisons.', 'info')
             return redirect(url_for('compare_page'))
         except Exception as e:
@@ -778,25 +1109,100 @@ def settings_page():
     user_settings = session.get('user_settings', {})
     default_float = user_settings.get('float_tolerance', COMPARISON_DEFAULTS['float_tolerance'])
     default_max = user_settings.get('max_rows_limit', SAMPLING_CONFIG['max_rows_for_comparison'])
-    saved = _get_connection_settings()
-    connection_settings = {
-        'dev_host': saved.get('dev_host', DEV_DEFAULTS['host']),
-        'dev_port': saved.get('dev_port', DEV_DEFAULTS['port']),
-        'dev_database': saved.get('dev_database', DEV_DEFAULTS['database']),
-        'dev_token': saved.get('dev_token', DEV_DEFAULTS['token']),
-        'prod_host': saved.get('prod_host', PROD_DEFAULTS['host']),
-        'prod_port': saved.get('prod_port', PROD_DEFAULTS['port']),
-        'prod_database': saved.get('prod_database', PROD_DEFAULTS['database']),
-        'prod_token': saved.get('prod_token', PROD_DEFAULTS['token']),
-    }
-    return render_template('settings.html', default_float=default_float, default_max=default_max, connection_settings=connection_settings)
+    connection_settings = _get_connection_settings_view()
+    response = app.make_response(render_template('settings.html', default_float=default_float, default_max=default_max,
+                                                 connection_settings=connection_settings))
+    # The page embeds access tokens: never let the browser keep a copy
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+def _revalidated_json(obj):
+    """JSON response whose ETag is a hash of its body, so unchanged polls get a 304."""
+    body = _dumps(obj)
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+    return _conditional_response(app.response_class(body, mimetype='application/json'), etag)
 
 
 @app.route('/api/status/<comparison_id>')
 def get_status(comparison_id):
     """Get comparison status via API."""
     status = comparison_status.get(comparison_id, {'status': 'not_found', 'progress': 'Comparison not found'})
-    return jsonify(status)
+    return _revalidated_json(status)
+
+
+# Statuses after which a comparison's status no longer changes
+_FINAL_STATUSES = ('completed', 'cancelled', 'error')
+_STATUS_NOT_FOUND = {'status': 'not_found', 'progress': 'Comparison not found'}
+_STATUS_KEEPALIVE_SECONDS = 15
+# Each open status stream holds a server thread until its comparison finishes, so only some
+# threads may stream; further clients get a 503 and fall back to polling /api/status.
+_MAX_STATUS_STREAMS = APP_CONFIG.get('max_status_streams') or max(1, APP_CONFIG.get('server_threads', 8) // 2)
+_status_stream_slots = threading.BoundedSemaphore(_MAX_STATUS_STREAMS)
+
+
+def _sse(event, data) -> str:
+    """Format one Server-Sent Event."""
+    body = _dumps(data)
+    if isinstance(body, bytes):
+        body = body.decode('utf-8')
+    return f'event: {event}\ndata: {body}\n\n'
+
+
+def _status_events(comparison_id):
+    """Yield a full status snapshot, then one small delta per published change.
+
+    Deltas carry only the top-level fields that changed and the table entries that were
+    replaced (snapshots are copy-on-write, so unchanged entries are the same objects).
+    The stream ends once the comparison reaches a final status or is not found.
+    """
+    last = None
+    while True:
+        with _status_changed:
+            current = comparison_status.get(comparison_id)
+            if last is not None and current is last:
+                _status_changed.wait(timeout=_STATUS_KEEPALIVE_SECONDS)
+                current = comparison_status.get(comparison_id)
+        
+        if current is None:
+            yield _sse('snapshot', _STATUS_NOT_FOUND)
+            return
+        if current is last:
+            yield ': keep-alive\n\n'
+            continue
+        
+        if last is None:
+            yield _sse('snapshot', current)
+        else:
+            fields = {key: value for key, value in current.items()
+                      if key != 'table_list' and last.get(key) != value}
+            old_tables = last.get('table_list', [])
+            new_tables = current.get('table_list', [])
+            if len(old_tables) == len(new_tables):
+                tables = [row for row, old_row in zip(new_tables, old_tables) if row is not old_row]
+            else:
+                fields['table_list'] = new_tables
+                tables = []
+            yield _sse('update', {'fields': fields, 'tables': tables})
+        
+        if current.get('status') in _FINAL_STATUSES:
+            return
+        last = current
+
+
+@app.route('/api/status/<comparison_id>/events')
+def stream_status(comparison_id):
+    """Stream comparison status changes as Server-Sent Events."""
+    if not _status_stream_slots.acquire(blocking=False):
+        # EventSource treats a non-200 answer as fatal, and the pages then poll instead
+        return _json({'error': 'Too many status streams open; poll /api/status instead'}, 503)
+    response = Response(_status_events(comparison_id), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # Runs when the server closes the response: stream finished or client gone
+    response.call_on_close(_status_stream_slots.release)
+    return response
 
 
 @app.route('/api/status/latest')
@@ -805,18 +1211,16 @@ def get_latest_status():
     if 'last_comparison_id' in session:
         comparison_id = session['last_comparison_id']
         status = comparison_status.get(comparison_id, {'status': 'not_found', 'progress': 'Comparison not found'})
-        status['comparison_id'] = comparison_id
-        return jsonify(status)
+        return _revalidated_json({**status, 'comparison_id': comparison_id})
     else:
-        return jsonify({'status': 'no_comparison', 'message': 'No comparison found'})
+        return _json({'status': 'no_comparison', 'message': 'No comparison found'})
 
 
 @app.route('/api/clear-session', methods=['POST'])
 def clear_session():
     """Clear saved form data from session."""
-    if 'last_comparison' in session:
-        session.pop('last_comparison', None)
-    return jsonify({'success': True, 'message': 'Session cleared'})
+    _clear_last_comparison()
+    return _json({'success': True, 'message': 'Session cleared'})
 
 
 @app.route('/api/clear-saved-credentials', methods=['POST'])
@@ -829,29 +1233,44 @@ def clear_saved_credentials():
 @app.route('/api/cancel/<comparison_id>', methods=['POST'])
 def cancel_comparison(comparison_id):
     """Cancel a running comparison."""
-    if comparison_id not in comparison_status:
-        return jsonify({'success': False, 'error': 'Comparison not found'}), 404
+    status = comparison_status.get(comparison_id)
+    if status is None:
+        return _json({'success': False, 'error': 'Comparison not found'}, 404)
     
-    status = comparison_status[comparison_id]
-    if status['status'] != 'running':
-        return jsonify({'success': False, 'error': 'Comparison is not running'}), 400
+    # Not started yet: drop it from the queue
+    future = _comparison_futures.get(comparison_id)
+    if status['status'] == 'pending' and future is not None and future.cancel():
+        _update_status(comparison_id, status='cancelled', progress='Cancelled before it started', can_cancel=False)
+        logger.info(f"Queued comparison {comparison_id} cancelled before it started")
+        return _json({'success': True, 'message': 'Comparison cancelled'})
+    
+    if status['status'] not in ('running', 'pending'):
+        return _json({'success': False, 'error': 'Comparison is not running'}, 400)
     
     if not status.get('can_cancel', False):
-        return jsonify({'success': False, 'error': 'Comparison cannot be cancelled at this time'}), 400
+        return _json({'success': False, 'error': 'Comparison cannot be cancelled at this time'}, 400)
     
     # Mark for cancellation
     cancellation_requests[comparison_id] = True
     logger.info(f"Cancellation requested for comparison {comparison_id}")
     
-    return jsonify({'success': True, 'message': 'Cancellation requested'})
+    return _json({'success': True, 'message': 'Cancellation requested'})
 
-@app.route('/api/results/<comparison_id>')
-def get_results(comparison_id):
-    """Get comparison results via API."""
-    if comparison_id not in comparison_results:
-        return jsonify({'error': 'Results not found'}), 404
-    
-    data = comparison_results[comparison_id]
+
+# ComparisonResult attributes copied as-is into each entry of the results payload
+_RESULT_FIELDS = (
+    'prod_table', 'dev_table', 'display_name', 'tables_identical',
+    'dev_row_count', 'prod_row_count', 'dev_compared_rows', 'prod_compared_rows',
+    'was_limited', 'max_rows_setting', 'sampling_method',
+    'missing_from_dev', 'missing_from_prod', 'differing_rows', 'schema_differences',
+    'ignored_columns', 'compared_columns', 'comparison_duration', 'error_message',
+    'prod_primary_key_columns', 'dev_primary_key_columns',
+)
+_get_result_fields = operator.attrgetter(*_RESULT_FIELDS)
+
+
+def _build_result_payload(data):
+    """Convert a stored comparison entry into the JSON-serializable results payload."""
     batch_result = data['result']
     
     # Convert batch result to JSON-serializable format
@@ -873,68 +1292,107 @@ def get_results(comparison_id):
     
     # Convert individual results
     for result in batch_result.results:
-        result_dict = {
-            'prod_table': result.prod_table,
-            'dev_table': result.dev_table,
-            'display_name': result.display_name,
-            'tables_identical': result.tables_identical,
-            'dev_row_count': result.dev_row_count,
-            'prod_row_count': result.prod_row_count,
-            'dev_compared_rows': result.dev_compared_rows,
-            'prod_compared_rows': result.prod_compared_rows,
-            'was_limited': result.was_limited,
-            'max_rows_setting': result.max_rows_setting,
-            'sampling_method': result.sampling_method,
-            'missing_from_dev': result.missing_from_dev[:50],
-            'missing_from_prod': result.missing_from_prod[:50],
-            'differing_rows': result.differing_rows[:20],
-            'schema_differences': result.schema_differences,
-            'ignored_columns': result.ignored_columns,
-            'compared_columns': result.compared_columns,
-            'comparison_duration': result.comparison_duration,
-            'error_message': result.error_message,
-            'prod_primary_key_columns': result.prod_primary_key_columns,
-            'dev_primary_key_columns': result.dev_primary_key_columns,
-            'executed_queries': result.executed_queries or {'DEV': [], 'PROD': []},
-            'summary': {
-                'total_missing_dev': len(result.missing_from_dev),
-                'total_missing_prod': len(result.missing_from_prod),
-                'total_differing': len(result.differing_rows)
-            }
+        result_dict = dict(zip(_RESULT_FIELDS, _get_result_fields(result)))
+        result_dict['executed_queries'] = result.executed_queries or {'DEV': [], 'PROD': []}
+        result_dict['summary'] = {
+            'total_missing_dev': result.missing_from_dev_count,
+            'total_missing_prod': result.missing_from_prod_count,
+            'total_differing': result.differing_rows_count
         }
         result_data['results'].append(result_dict)
     
-    return jsonify(result_data)
+    return result_data
+
+
+@app.route('/api/results/<comparison_id>')
+def get_results(comparison_id):
+    """Get comparison results via API."""
+    data = comparison_results.get(comparison_id)
+    if data is None:
+        return _json({'error': 'Results not found'}, 404)
+    
+    # The payload was serialized when the comparison finished
+    return app.response_class(data['payload_json'], mimetype='application/json')
 
 
 @app.route('/shutdown', methods=['POST'])
 def shutdown():
     """Shutdown the Flask server."""
-    import os
-    import signal
-    
-    def shutdown_server():
+    def shutdown_server(running):
+        # Give running comparisons a bounded time to see their cancellation request
+        if running:
+            wait(running, timeout=_SHUTDOWN_GRACE_SECONDS)
         # Get the current process ID
         pid = os.getpid()
         # Send SIGTERM signal to terminate the process
         os.kill(pid, signal.SIGTERM)
     
-    # Schedule shutdown in a separate thread to allow response to be sent
-    threading.Timer(1.0, shutdown_server).start()
+    # Stop taking work: drop queued comparisons and ask running ones to stop.
+    # Snapshot first: cancelling a queued future runs its done callback, which drops it from _comparison_futures.
+    with _submit_lock:
+        _shutting_down.set()
+        futures = list(_comparison_futures.items())
+        comparison_executor.shutdown(wait=False, cancel_futures=True)
+    running = []
+    for comparison_id, future in futures:
+        if future.cancelled():
+            _update_status(comparison_id, status='cancelled', progress='Cancelled - server shut down', can_cancel=False)
+        elif not future.done():
+            cancellation_requests[comparison_id] = True
+            running.append(future)
+    
+    # Schedule shutdown in a separate thread to allow response to be sent.
+    # (Werkzeug no longer provides a server-shutdown hook, so the process signals itself.)
+    threading.Timer(1.0, shutdown_server, args=(running,)).start()
     
     return jsonify({'message': 'Server shutting down...'}), 200
 
 
+def _open_url(url: str):
+    """Hand the URL to the OS default browser without waiting for it."""
+    try:
+        if sys.platform == 'win32':
+            os.startfile(url)
+        else:
+            opener = 'open' if sys.platform == 'darwin' else 'xdg-open'
+            subprocess.Popen([opener, url], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except OSError:
+        import webbrowser
+        webbrowser.open_new_tab(url)
+
+
+def _open_browser_once(url: str, delay: float):
+    """Open the app in the browser once per launch.
+
+    The flag is kept in the environment so processes started from this one (the debug
+    reloader's server processes) inherit it and don't open another tab on every reload.
+    """
+    if os.environ.get('TC_BROWSER_OPENED') == '1':
+        return
+    os.environ['TC_BROWSER_OPENED'] = '1'
+    timer = threading.Timer(delay, _open_url, args=(url,))
+    timer.daemon = True
+    timer.start()
+
+
 if __name__ == '__main__':
-    # Auto-open browser once on startup.
-    # When debug reloader is enabled, the app process starts twice; only open on the reloader child.
-    should_open = (not APP_CONFIG.get('debug')) or (os.environ.get('WERKZEUG_RUN_MAIN') == 'true')
-    if should_open:
-        url = f"http://127.0.0.1:{APP_CONFIG['port']}"
-        threading.Timer(0.8, lambda: webbrowser.open_new_tab(url)).start()
-
-    app.run(
-        debug=APP_CONFIG['debug'],
-        host=APP_CONFIG['host'],
-        port=APP_CONFIG['port']
-    )
\ No newline at end of file
+    # Auto-open browser once on startup. With the debug reloader this runs in the watcher
+    # process, before it starts the server process, so allow the server a moment to come up.
+    _open_browser_once(f"http://127.0.0.1:{APP_CONFIG['port']}", delay=1.5 if APP_CONFIG['debug'] else 0.8)
+
+    if APP_CONFIG['debug']:
+        # Werkzeug dev server: auto-reload and interactive tracebacks
+        app.run(
+            debug=True,
+            host=APP_CONFIG['host'],
+            port=APP_CONFIG['port']
+        )
+    else:
+        try:
+            from waitress import serve
+        except ImportError:
+            logger.warning("waitress is not installed; falling back to the Flask development server")
+            app.run(host=APP_CONFIG['host'], port=APP_CONFIG['port'], threaded=True)
+        else:
+            # Single process on purpose: comparison status and results live in this process's memory
+            serve(app, host=APP_CONFIG['host'], port=APP_CONFIG['port'], threads=APP_CONFIG.get('server_threads', 8))
\ No newline at end of file
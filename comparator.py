@@ -5,14 +5,27 @@ Database Table Comparator Module - Enhanced for Multiple Table Pairs
 
 import sys
 import logging
-from typing import Dict, List, Tuple, Any, Optional
+import queue
+import multiprocessing.util
+from collections.abc import Sequence
+from typing import Callable, Dict, FrozenSet, Iterator, List, Tuple, Any, Optional
+from contextlib import contextmanager
 from dataclasses import dataclass
+from functools import cached_property
 from datetime import datetime
+import numpy as np
 import pandas as pd
 from databricks import sql
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
 import threading
 
+try:
+    import pyarrow
+except ImportError:  # optional: installed with databricks-sql-connector[pyarrow]
+    pyarrow = None
+
+from config import SAMPLING_CONFIG, BATCH_CONFIG, QUERY_CONFIG
+
 
 @dataclass
 class DatabaseConfig:
@@ -39,6 +52,52 @@ class TablePairConfig:
     # Optional per-environment row filters: { column_name: [values...] }
     prod_row_filters: Dict[str, List[str]] = None
     dev_row_filters: Dict[str, List[str]] = None
+    
+    @cached_property
+    def ignored_columns_lower(self) -> FrozenSet[str]:
+        """Lowercased names of the columns left out of the comparison, ignored primary keys included."""
+        ignored = {col.lower() for col in self.ignored_columns}
+        if self.ignore_prod_pks:
+            ignored.update(pk.lower() for pk in self.prod_primary_keys)
+        if self.ignore_dev_pks:
+            ignored.update(pk.lower() for pk in self.dev_primary_keys)
+        return frozenset(ignored)
+
+
+class DifferingRows(Sequence):
+    """The differing rows of a comparison, stored column-wise: one entry per differing cell, grouped by row.
+    
+    Reads as the list of {'primary_key': ..., 'differences': [{'column', 'dev_value', 'prod_value'}, ...]}
+    dicts it stands for, but a row's dicts are only built when that row is read, so keeping or showing
+    the first rows of a large diff never builds the others.
+    """
+    
+    def __init__(self, primary_keys: List[str], row_starts: List[int], columns: np.ndarray,
+                 dev_values: np.ndarray, prod_values: np.ndarray):
+        self.primary_keys = primary_keys
+        # Offset of each row's first cell, followed by the total number of cells
+        self.row_starts = row_starts
+        self.columns = columns
+        self.dev_values = dev_values
+        self.prod_values = prod_values
+    
+    def __len__(self) -> int:
+        return len(self.primary_keys)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('differing row index out of range')
+        return {
+            'primary_key': self.primary_keys[index],
+            'differences': [
+                {'column': self.columns[k], 'dev_value': self.dev_values[k], 'prod_value': self.prod_values[k]}
+                for k in range(self.row_starts[index], self.row_starts[index + 1])
+            ]
+        }
 
 
 @dataclass
@@ -54,7 +113,7 @@ class ComparisonResult:
     prod_compared_rows: int
     missing_from_dev: List[str]
     missing_from_prod: List[str]
-    differing_rows: List[Dict[str, Any]]
+    differing_rows: Sequence  # of {'primary_key': ..., 'differences': [...]} dicts; see DifferingRows
     schema_differences: List[str]
     ignored_columns: List[str]
     compared_columns: List[str]
@@ -66,6 +125,24 @@ class ComparisonResult:
     dev_primary_key_columns: List[str]
     executed_queries: Dict[str, List[Dict[str, str]]] = None  # {'DEV': [{'query': '', 'description': '', 'environment': ''}], 'PROD': [...]}
     error_message: Optional[str] = None
+    # Full sizes of the detail lists; they stay correct after truncate_details()
+    missing_from_dev_count: Optional[int] = None
+    missing_from_prod_count: Optional[int] = None
+    differing_rows_count: Optional[int] = None
+
+    def __post_init__(self):
+        if self.missing_from_dev_count is None:
+            self.missing_from_dev_count = len(self.missing_from_dev or [])
+        if self.missing_from_prod_count is None:
+            self.missing_from_prod_count = len(self.missing_from_prod or [])
+        if self.differing_rows_count is None:
+            self.differing_rows_count = len(self.differing_rows or [])
+
+    def truncate_details(self, max_missing: int, max_differing: int):
+        """Keep only the first rows of each detail list; the *_count fields keep the full sizes."""
+        self.missing_from_dev = (self.missing_from_dev or [])[:max_missing]
+        self.missing_from_prod = (self.missing_from_prod or [])[:max_missing]
+        self.differing_rows = (self.differing_rows or [])[:max_differing]
 
 
 @dataclass
@@ -78,7 +155,85 @@ class BatchComparisonResult:
     different_tables: int
     results: List[ComparisonResult]
     total_duration: float
-    summary: Dict[str, Any]
+
+    @cached_property
+    def summary(self) -> Dict[str, Any]:
+        """Aggregate counters and rates, built on first access."""
+        return {
+            'total_pairs': self.total_pairs,
+            'successful_comparisons': self.successful_comparisons,
+            'failed_comparisons': self.failed_comparisons,
+            'identical_tables': self.identical_tables,
+            'different_tables': self.different_tables,
+            'success_rate': (self.successful_comparisons / self.total_pairs) * 100 if self.total_pairs else 0,
+            'identical_rate': (self.identical_tables / self.successful_comparisons) * 100 if self.successful_comparisons else 0
+        }
+
+
+class ConnectionPool:
+    """Bounded pool of connections to one warehouse.
+    
+    Connections are opened on first use and handed back for reuse, so concurrent workers share
+    at most max_size connections instead of opening one each.
+    """
+    
+    def __init__(self, config: DatabaseConfig, max_size: int):
+        self.config = config
+        self.max_size = max_size
+        self.logger = logging.getLogger(__name__)
+        # One slot per allowed connection; None marks a slot whose connection isn't open yet.
+        # LIFO hands out the most recently used (warm) connection first.
+        self._idle = queue.LifoQueue(maxsize=max_size)
+        for _ in range(max_size):
+            self._idle.put(None)
+        self._opened = []
+        self._lock = threading.Lock()
+    
+    def acquire(self, timeout: Optional[float] = None):
+        """Take a connection from the pool, opening one if needed; blocks while all are in use."""
+        try:
+            connection = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No {self.config.environment} connection available after {timeout}s") from None
+        if connection is not None:
+            return connection
+        try:
+            connection = sql.connect(
+                server_hostname=self.config.host,
+                http_path=f"/sql/1.0/warehouses/{self.config.port}",
+                access_token=self.config.token
+            )
+        except Exception as e:
+            self._idle.put(None)
+            self.logger.error(f"Failed to connect to {self.config.environment} database: {str(e)}")
+            raise
+        with self._lock:
+            self._opened.append(connection)
+        self.logger.info(f"Created new connection for {self.config.environment}")
+        return connection
+    
+    def release(self, connection):
+        """Return a connection taken with acquire."""
+        self._idle.put(connection)
+    
+    def close(self):
+        """Close every connection opened by the pool; later acquires open new ones."""
+        with self._lock:
+            opened, self._opened = self._opened, []
+        for connection in opened:
+            try:
+                connection.close()
+            except Exception as e:
+                self.logger.warning(f"Error closing {self.config.environment} connection: {str(e)}")
+        self.logger.info(f"Closed {len(opened)} {self.config.environment} connection(s)")
+        # Reset the slots so closed connections are never handed out again
+        while True:
+            try:
+                self._idle.get_nowait()
+            except queue.Empty:
+                break
+        for _ in range(self.max_size):
+            self._idle.put(None)
 
 
 class DatabaseTableComparator:
@@ -92,79 +247,103 @@ class DatabaseTableComparator:
         self.float_tolerance = float_tolerance
         self.user_max_rows = user_max_rows  # ADICIONAR ESTA LINHA
         self.logger = logging.getLogger(__name__)
-        self._connections = {}
-        self._connection_lock = threading.Lock()
-        # Query tracking
-        self.executed_queries = {'DEV': [], 'PROD': []}
+        # Query tracking (per thread, so concurrent pair comparisons don't share a log)
+        self._query_tracking = threading.local()
+        # Row counts (prefetched by prefetch_row_counts or fetched earlier), keyed by _row_count_cache_key
+        self._row_count_cache = {}
+        # DESCRIBE TABLE results, keyed by (environment, database, table)
+        self._schema_cache = {}
+        # Each concurrently compared pair holds at most one connection per environment at a time
+        concurrent_pairs = BATCH_CONFIG['max_concurrent_comparisons'] if BATCH_CONFIG['enable_parallel_processing'] else 1
+        self._concurrent_pairs = max(1, concurrent_pairs)
+        self._pools = {
+            config.environment: ConnectionPool(config, self._concurrent_pairs)
+            for config in (dev_config, prod_config)
+        }
+        # Runs the PROD side of each pair while the pair's own thread fetches DEV
+        self._prod_fetch_executor = self._new_prod_fetch_executor()
+    
+    def _new_prod_fetch_executor(self) -> ThreadPoolExecutor:
+        """Executor for the PROD side of pairs; its threads are only started once work is submitted."""
+        return ThreadPoolExecutor(max_workers=self._concurrent_pairs, thread_name_prefix='prod-fetch')
+    
+    @property
+    def executed_queries(self) -> Dict[str, List[Dict[str, str]]]:
+        """Queries tracked for the comparison running on the current thread."""
+        queries = getattr(self._query_tracking, 'queries', None)
+        if queries is None:
+            queries = self._query_tracking.queries = {'DEV': [], 'PROD': []}
+        return queries
+    
+    @executed_queries.setter
+    def executed_queries(self, queries: Dict[str, List[Dict[str, str]]]):
+        self._query_tracking.queries = queries
         
-    def get_connection(self, config: DatabaseConfig):
-        """Get or create a database connection with thread safety."""
-        connection_key = f"{config.environment}_{threading.current_thread().ident}"
-        
-        with self._connection_lock:
-            if connection_key not in self._connections:
-                try:
-                    connection = sql.connect(
-                        server_hostname=config.host,
-                        http_path=f"/sql/1.0/warehouses/{config.port}",
-                        access_token=config.token
-                    )
-                    self._connections[connection_key] = connection
-                    self.logger.info(f"Created new connection for {config.environment}")
-                except Exception as e:
-                    self.logger.error(f"Failed to connect to {config.environment} database: {str(e)}")
-                    raise
-            
-            return self._connections[connection_key]
+    @contextmanager
+    def borrow(self, config: DatabaseConfig):
+        """Borrow a connection to the given environment from its pool for the duration of a with-block."""
+        pool = self._pools[config.environment]
+        connection = pool.acquire()
+        try:
+            yield connection
+        finally:
+            pool.release(connection)
     
     def close_connections(self):
-        """Close all database connections."""
-        with self._connection_lock:
-            for connection_key, connection in self._connections.items():
-                try:
-                    connection.close()
-                    self.logger.info(f"Closed connection: {connection_key}")
-                except Exception as e:
-                    self.logger.warning(f"Error closing connection {connection_key}: {str(e)}")
-            self._connections.clear()
-    
-    def execute_and_track_query(self, cursor, query: str, environment: str, description: str = ""):
-        """Execute a query and track it for later reference."""
+        """Close all database connections and release the PROD fetch threads."""
+        for pool in self._pools.values():
+            pool.close()
+        # Idle threads exit now; a fresh executor (no threads until used) keeps the comparator reusable
+        self._prod_fetch_executor.shutdown(wait=False)
+        self._prod_fetch_executor = self._new_prod_fetch_executor()
+        self._row_count_cache.clear()
+        self._schema_cache.clear()
+    
+    def track_query(self, query: str, environment: str, description: str = "",
+                    parameters: Optional[Dict[str, str]] = None):
+        """Record a query in the per-comparison query log without executing it."""
+        query = query.strip()
+        if parameters:
+            # Keep the logged query readable by listing the values bound to its markers
+            bound = "\n".join(f"-- :{name} = {value!r}" for name, value in parameters.items())
+            query = f"{query}\n{bound}"
+        
+        # The log is created with both 'DEV' and 'PROD' keys, the only environments a config can have
+        queries = self.executed_queries[environment]
+        queries.append({
+            'query': query,
+            'description': description,
+            'environment': environment
+        })
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(">>> Query tracked for %s. Total queries now: %d", environment, len(queries))
+    
+    def execute_and_track_query(self, cursor, query: str, environment: str, description: str = "",
+                                parameters: Optional[Dict[str, str]] = None):
+        """Execute a query, binding the values of its :name markers from parameters, and track it for later reference."""
         try:
-            # Log query execution for debugging
-            self.logger.info(f">>> EXECUTING QUERY IN {environment}: {description}")
-            self.logger.info(f">>> Current executed_queries keys: {list(self.executed_queries.keys())}")
-            
-            # Ensure the environment key exists in the tracking dictionary
-            if environment not in self.executed_queries:
-                self.executed_queries[environment] = []
-                self.logger.info(f">>> Created new environment key: {environment}")
-            
-            # Clean up the query for better readability
-            clean_query = ' '.join(query.strip().split())
-            
-            # Add to tracking with description
-            query_info = {
-                'query': query.strip(),
-                'description': description,
-                'environment': environment
-            }
-            self.executed_queries[environment].append(query_info)
-            self.logger.info(f">>> Query tracked for {environment}. Total queries now: {len(self.executed_queries[environment])}")
-            
-            # Execute the query
-            cursor.execute(query)
+            self.logger.info(">>> EXECUTING QUERY IN %s: %s", environment, description)
+            self.track_query(query, environment, description, parameters)
+            if parameters:
+                cursor.execute(query, parameters)
+            else:
+                cursor.execute(query)
             return cursor
         except Exception as e:
             self.logger.error(f"Error in execute_and_track_query: {str(e)}")
             raise
-        return cursor
     
     def fetch_table_schema(self, connection, config: DatabaseConfig, table_name: str) -> pd.DataFrame:
         """Fetch table schema information."""
         try:
             query = f"DESCRIBE TABLE {config.database_name}.{table_name}"
             
+            # Tables repeated across a batch are described only once
+            cache_key = (config.environment, config.database_name, table_name)
+            if cache_key in self._schema_cache:
+                self.track_query(query, config.environment, f"Get schema for table {table_name} (cached)")
+                return self._schema_cache[cache_key].copy()
+            
             with connection.cursor() as cursor:
                 self.execute_and_track_query(cursor, query, config.environment, f"Get schema for table {table_name}")
                 schema_data = cursor.fetchall()
@@ -172,7 +351,8 @@ class DatabaseTableComparator:
                 
             schema_df = pd.DataFrame(schema_data, columns=columns)
             self.logger.info(f"Retrieved schema for {config.environment}.{table_name}: {len(schema_df)} columns")
-            return schema_df
+            self._schema_cache[cache_key] = schema_df
+            return schema_df.copy()
             
         except Exception as e:
             self.logger.error(f"Failed to fetch schema from {config.environment}.{table_name}: {str(e)}")
@@ -183,178 +363,269 @@ class DatabaseTableComparator:
                         row_filters: Optional[Dict[str, List[str]]] = None) -> pd.DataFrame:
         """Fetch data from the specified table with optional row limiting."""
         try:
-            from config import SAMPLING_CONFIG
-            
-            # SEMPRE usar as primary keys do formulário para ordenação
-            order_clause = ", ".join(primary_keys)
-
-            # Build optional exclusion WHERE clause
-            filter_clause = self._build_where_exclusion_clause(row_filters)
-            
-            # Use user-defined max_rows if available, otherwise use config default
-            effective_max_rows = max_rows
-            if self.user_max_rows is not None:
-                effective_max_rows = self.user_max_rows if self.user_max_rows > 0 else None
-            
-            if effective_max_rows and effective_max_rows > 0:
-                sampling_method = SAMPLING_CONFIG.get('sampling_method', 'TOP_N')
-                
-                if sampling_method == 'LAST_N':
-                    query = f"""
-                    WITH generate_pk AS (
-                        SELECT *,
-                            ROW_NUMBER() OVER (ORDER BY {order_clause}) as pk_comparison_app
-                        FROM {config.database_name}.{table_name}
-                        {filter_clause}
-                    )
-                    ,ranked_data AS (
-                        SELECT *,
-                            ROW_NUMBER() OVER (ORDER BY pk_comparison_app DESC) as rn
-                        FROM generate_pk
-                    )
-                    SELECT * EXCEPT(rn)
-                    FROM ranked_data
-                    WHERE rn <= {effective_max_rows}
-                    ORDER BY {order_clause} ASC
-                    """
-                    self.logger.info(f"Fetching LAST {effective_max_rows:,} rows from {config.environment}.{table_name} ordered by {order_clause}")
-                    
-                elif sampling_method == 'RANDOM':
-                    query = f"""
-                    SELECT * FROM {config.database_name}.{table_name}
-                    {filter_clause}
-                    ORDER BY RAND(12345)
-                    LIMIT {effective_max_rows}
-                    """
-                    self.logger.info(f"Fetching RANDOM {effective_max_rows:,} rows from {config.environment}.{table_name}")
-                    
-                else:  # TOP_N
-                    query = f"""
-                    SELECT * FROM {config.database_name}.{table_name}
-                    {filter_clause}
-                    ORDER BY {order_clause} ASC
-                    LIMIT {effective_max_rows}
-                    """
-                    self.logger.info(f"Fetching FIRST {effective_max_rows:,} rows from {config.environment}.{table_name} ordered by {order_clause}")
-            else:
-                query = f"""
-                SELECT * FROM {config.database_name}.{table_name}
-                {filter_clause}
-                ORDER BY {order_clause} ASC
-                """
-                self.logger.info(f"Fetching ALL data from {config.environment}.{table_name} ordered by {order_clause}")
+            query, parameters, description = self._build_data_query(config, table_name, primary_keys,
+                                                                    max_rows, row_filters)
             
             with connection.cursor() as cursor:
-                # Determine the query description based on the sampling method and limits
-                if effective_max_rows:
-                    sampling_method = SAMPLING_CONFIG.get('sampling_method', 'TOP_N')
-                    description = f"Fetch {sampling_method} {effective_max_rows:,} rows from table {table_name}"
-                else:
-                    description = f"Fetch ALL data from table {table_name}"
-                
-                self.execute_and_track_query(cursor, query, config.environment, description)
-                data = cursor.fetchall()
-                columns = [desc[0] for desc in cursor.description]
+                self.execute_and_track_query(cursor, query, config.environment, description, parameters)
+                df = self._fetch_dataframe(cursor)
                 
-            df = pd.DataFrame(data, columns=columns)
             self.logger.info(f"Retrieved {len(df)} rows from {config.environment}.{table_name}")
             return df
             
         except Exception as e:
             self.logger.error(f"Failed to fetch data from {config.environment}.{table_name}: {str(e)}")
             raise
+    
+    def _effective_max_rows(self, max_rows: Optional[int]) -> Optional[int]:
+        """Row limit to apply, with the user's override taking precedence over max_rows."""
+        if self.user_max_rows is not None:
+            return self.user_max_rows if self.user_max_rows > 0 else None
+        return max_rows
+    
+    def _build_data_query(self, config: DatabaseConfig, table_name: str, primary_keys: List[str],
+                          max_rows: Optional[int],
+                          row_filters: Optional[Dict[str, List[str]]]) -> Tuple[str, Dict[str, str], str]:
+        """Build the query selecting the (sampled) rows to compare.
+        
+        Returns the query, the values of its parameter markers and its description for the query log.
+        """
+        # SEMPRE usar as primary keys do formulário para ordenação
+        order_clause = ", ".join(primary_keys)
 
-    def _build_where_exclusion_clause(self, row_filters: Optional[Dict[str, List[str]]]) -> str:
+        # Build optional exclusion WHERE clause
+        filter_clause, parameters = self._build_where_exclusion_clause(row_filters)
+        
+        # Use user-defined max_rows if available, otherwise use config default
+        effective_max_rows = self._effective_max_rows(max_rows)
+        
+        if effective_max_rows and effective_max_rows > 0:
+            sampling_method = SAMPLING_CONFIG.get('sampling_method', 'TOP_N')
+            
+            if sampling_method == 'LAST_N':
+                query = f"""
+                WITH generate_pk AS (
+                    SELECT *,
+                        ROW_NUMBER() OVER (ORDER BY {order_clause}) as pk_comparison_app
+                    FROM {config.database_name}.{table_name}
+                    {filter_clause}
+                )
+                ,ranked_data AS (
+                    SELECT *,
+                        ROW_NUMBER() OVER (ORDER BY pk_comparison_app DESC) as rn
+                    FROM generate_pk
+                )
+                SELECT * EXCEPT(rn)
+                FROM ranked_data
+                WHERE rn <= {effective_max_rows}
+                ORDER BY {order_clause} ASC
+                """
+                self.logger.info(f"Fetching LAST {effective_max_rows:,} rows from {config.environment}.{table_name} ordered by {order_clause}")
+                
+            elif sampling_method == 'RANDOM':
+                query = f"""
+                SELECT * FROM {config.database_name}.{table_name}
+                {filter_clause}
+                ORDER BY RAND(:sampling_seed)
+                LIMIT {effective_max_rows}
+                """
+                parameters['sampling_seed'] = SAMPLING_CONFIG.get('random_seed', 12345)
+                self.logger.info(f"Fetching RANDOM {effective_max_rows:,} rows from {config.environment}.{table_name}")
+                
+            else:  # TOP_N
+                query = f"""
+                SELECT * FROM {config.database_name}.{table_name}
+                {filter_clause}
+                ORDER BY {order_clause} ASC
+                LIMIT {effective_max_rows}
+                """
+                self.logger.info(f"Fetching FIRST {effective_max_rows:,} rows from {config.environment}.{table_name} ordered by {order_clause}")
+        else:
+            query = f"""
+            SELECT * FROM {config.database_name}.{table_name}
+            {filter_clause}
+            ORDER BY {order_clause} ASC
+            """
+            self.logger.info(f"Fetching ALL data from {config.environment}.{table_name} ordered by {order_clause}")
+        
+        # Determine the query description based on the sampling method and limits
+        if effective_max_rows:
+            sampling_method = SAMPLING_CONFIG.get('sampling_method', 'TOP_N')
+            description = f"Fetch {sampling_method} {effective_max_rows:,} rows from table {table_name}"
+        else:
+            description = f"Fetch ALL data from table {table_name}"
+        
+        return query, parameters, description
+
+    @staticmethod
+    def _fetch_dataframe(cursor) -> pd.DataFrame:
+        """Read the whole result set of an executed cursor into a DataFrame.
+        
+        With pyarrow available the rows stay in Arrow's columnar buffers until pandas takes them over,
+        instead of being materialized first as a list of Python tuples.
+        """
+        if pyarrow is not None:
+            return cursor.fetchall_arrow().to_pandas(split_blocks=True, self_destruct=True)
+        data = cursor.fetchall()
+        columns = [desc[0] for desc in cursor.description]
+        return pd.DataFrame(data, columns=columns)
+    
+    @staticmethod
+    def _iter_dataframes(cursor, chunk_rows: int) -> Iterator[pd.DataFrame]:
+        """Read the result set of an executed cursor as DataFrames of at most chunk_rows rows each."""
+        columns = [desc[0] for desc in cursor.description]
+        while True:
+            if pyarrow is not None:
+                chunk = cursor.fetchmany_arrow(chunk_rows).to_pandas(split_blocks=True, self_destruct=True)
+            else:
+                chunk = pd.DataFrame(cursor.fetchmany(chunk_rows), columns=columns)
+            if len(chunk):
+                yield chunk
+            if len(chunk) < chunk_rows:
+                return
+
+    @staticmethod
+    def _build_where_exclusion_clause(row_filters: Optional[Dict[str, List[str]]],
+                                      prefix: str = "filter") -> Tuple[str, Dict[str, str]]:
         """Given a mapping of column -> list of values, build a WHERE clause to EXCLUDE matching rows.
 
-        The form is: WHERE NOT (col1 IN (...) AND col2 IN (...) ...)
-        Returns an empty string if no filters provided.
+        The form is: WHERE NOT (col1 IN (:filter_0_0, ...) AND col2 IN (:filter_1_0, ...) ...)
+        The values are bound by the driver as named parameters, returned alongside the clause;
+        prefix keeps the marker names apart when several clauses end up in one query.
+        Returns an empty clause if no filters provided.
         """
+        parameters: Dict[str, str] = {}
         if not row_filters:
-            return ""
-
-        def is_number(value: str) -> bool:
-            try:
-                float(value)
-                return True
-            except Exception:
-                return False
+            return "", parameters
 
         parts: List[str] = []
-        for column_name, values in row_filters.items():
-            safe_values: List[str] = []
+        for column_index, (column_name, values) in enumerate(row_filters.items()):
+            markers: List[str] = []
             for raw in values:
                 val = str(raw).strip()
                 if val == "":
                     continue
-                if is_number(val):
-                    safe_values.append(val)
-                else:
-                    escaped = val.replace("'", "''")
-                    safe_values.append(f"'{escaped}'")
-            if not safe_values:
+                name = f"{prefix}_{column_index}_{len(markers)}"
+                parameters[name] = val
+                markers.append(f":{name}")
+            if not markers:
                 continue
-            parts.append(f"{column_name} IN ({', '.join(safe_values)})")
+            parts.append(f"{column_name} IN ({', '.join(markers)})")
 
         if not parts:
-            return ""
+            return "", parameters
 
-        return "WHERE NOT (" + " AND ".join(parts) + ")"
+        return "WHERE NOT (" + " AND ".join(parts) + ")", parameters
+    
+    @staticmethod
+    def _row_count_cache_key(config: DatabaseConfig, table_name: str,
+                             row_filters: Optional[Dict[str, List[str]]]) -> Tuple:
+        """Key identifying a (filtered) row count within one environment."""
+        filters_key = tuple(sorted((col, tuple(vals)) for col, vals in (row_filters or {}).items()))
+        return (config.environment, config.database_name, table_name, filters_key)
+    
+    def prefetch_row_counts(self, table_pairs: List[TablePairConfig]):
+        """Fetch the row counts of all tables with one UNION ALL query per environment.
+        
+        The counts are cached and picked up by get_row_count, collapsing one round-trip
+        per table into one per environment. If the batched query fails, the per-pair
+        count queries run as usual.
+        """
+        sides = (
+            (self.dev_config, [(pair.dev_table, pair.dev_row_filters) for pair in table_pairs]),
+            (self.prod_config, [(pair.prod_table, pair.prod_row_filters) for pair in table_pairs]),
+        )
+        for config, tables in sides:
+            keys = []
+            selects = []
+            parameters = {}
+            for table_name, row_filters in tables:
+                key = self._row_count_cache_key(config, table_name, row_filters)
+                if key in keys or key in self._row_count_cache:
+                    continue
+                filter_clause, filter_parameters = self._build_where_exclusion_clause(row_filters,
+                                                                                      f"filter_{len(keys)}")
+                parameters.update(filter_parameters)
+                selects.append(f"SELECT {len(keys)} AS table_index, COUNT(*) AS row_count "
+                               f"FROM {config.database_name}.{table_name} {filter_clause}")
+                keys.append(key)
+            
+            # A single table gains nothing from batching
+            if len(keys) < 2:
+                continue
+            
+            query = "\nUNION ALL\n".join(selects)
+            try:
+                with self.borrow(config) as connection, connection.cursor() as cursor:
+                    self.execute_and_track_query(cursor, query, config.environment,
+                                                 f"Get row counts for {len(keys)} tables", parameters)
+                    rows = cursor.fetchall()
+                for table_index, row_count in rows:
+                    self._row_count_cache[keys[table_index]] = row_count
+                self.logger.info(f"Prefetched {len(rows)} row counts from {config.environment}")
+            except Exception as e:
+                self.logger.warning(f"Batched row count query failed in {config.environment}, "
+                                    f"falling back to per-table counts: {str(e)}")
     
     def get_row_count(self, connection, config: DatabaseConfig, table_name: str,
                       row_filters: Optional[Dict[str, List[str]]] = None) -> int:
         """Get total row count for the table after applying optional exclusion filters."""
         try:
-            filter_clause = self._build_where_exclusion_clause(row_filters)
+            filter_clause, parameters = self._build_where_exclusion_clause(row_filters)
             query = f"SELECT COUNT(*) as row_count FROM {config.database_name}.{table_name} {filter_clause}"
             
+            cache_key = self._row_count_cache_key(config, table_name, row_filters)
+            if cache_key in self._row_count_cache:
+                row_count = self._row_count_cache[cache_key]
+                self.track_query(query, config.environment, f"Get row count for table {table_name} (cached)", parameters)
+                self.logger.info(f"{config.environment}.{table_name} row count (cached): {row_count}")
+                return row_count
+            
             with connection.cursor() as cursor:
-                self.execute_and_track_query(cursor, query, config.environment, f"Get row count for table {table_name}")
+                self.execute_and_track_query(cursor, query, config.environment, f"Get row count for table {table_name}",
+                                             parameters)
                 result = cursor.fetchone()
                 
             row_count = result[0] if result else 0
             self.logger.info(f"{config.environment}.{table_name} row count: {row_count}")
+            self._row_count_cache[cache_key] = row_count
             return row_count
             
         except Exception as e:
             self.logger.error(f"Failed to get row count from {config.environment}.{table_name}: {str(e)}")
             raise
     
-    def compare_schemas(self, dev_schema: pd.DataFrame, prod_schema: pd.DataFrame, ignored_columns: List[str]) -> List[str]:
-        """Compare schemas between DEV and PROD tables, ignoring specified columns."""
+    def compare_schemas(self, dev_schema: pd.DataFrame, prod_schema: pd.DataFrame,
+                        ignored_columns_lower: FrozenSet[str]) -> List[str]:
+        """Compare schemas between DEV and PROD tables, ignoring the given (lowercased) columns."""
         differences = []
         
-        # Convert ignored columns to lowercase for case-insensitive comparison
-        ignored_columns_lower = [col.lower() for col in ignored_columns]
+        # Map column -> data type once; DESCRIBE repeats partition columns further down, so keep the first row
+        dev_schema = dev_schema.drop_duplicates('col_name')
+        prod_schema = prod_schema.drop_duplicates('col_name')
+        dev_types = dict(zip(dev_schema['col_name'], dev_schema['data_type']))
+        prod_types = dict(zip(prod_schema['col_name'], prod_schema['data_type']))
         
         # Filter out ignored columns from both schemas
-        dev_columns = set([col for col in dev_schema['col_name'].tolist() 
-                        if col.lower() not in ignored_columns_lower])
-        prod_columns = set([col for col in prod_schema['col_name'].tolist() 
-                        if col.lower() not in ignored_columns_lower])
+        dev_columns = pd.Index([col for col in dev_types if col.lower() not in ignored_columns_lower])
+        prod_columns = pd.Index([col for col in prod_types if col.lower() not in ignored_columns_lower])
         
-        missing_in_prod = dev_columns - prod_columns
-        missing_in_dev = prod_columns - dev_columns
+        missing_in_prod = dev_columns.difference(prod_columns)
+        missing_in_dev = prod_columns.difference(dev_columns)
         
-        if missing_in_prod:
+        if len(missing_in_prod):
             differences.append(f"Columns missing in PROD: {', '.join(missing_in_prod)}")
         
-        if missing_in_dev:
+        if len(missing_in_dev):
             differences.append(f"Columns missing in DEV: {', '.join(missing_in_dev)}")
         
         # Check data types for common columns (excluding ignored ones)
-        common_columns = dev_columns & prod_columns
-        for col in common_columns:
-            # Use query method to avoid boolean array issues
-            dev_matches = dev_schema.query(f"col_name == '{col}'")
-            prod_matches = prod_schema.query(f"col_name == '{col}'")
+        for col in dev_columns.intersection(prod_columns):
+            dev_type = dev_types[col]
+            prod_type = prod_types[col]
             
-            if len(dev_matches) > 0 and len(prod_matches) > 0:
-                dev_type = dev_matches['data_type'].iloc[0]
-                prod_type = prod_matches['data_type'].iloc[0]
-                
-                if dev_type != prod_type:
-                    differences.append(f"Column '{col}' type mismatch: DEV({dev_type}) vs PROD({prod_type})")
+            if dev_type != prod_type:
+                differences.append(f"Column '{col}' type mismatch: DEV({dev_type}) vs PROD({prod_type})")
         
         return differences
     
@@ -389,13 +660,92 @@ class DatabaseTableComparator:
         
         return True
     
-    def create_primary_key(self, row: pd.Series, primary_keys: List[str], use_row_number: bool = False, row_number: int = None) -> str:
-        """Create a composite primary key string from row data."""
-        if use_row_number and row_number is not None:
-            return str(row_number)
+    @staticmethod
+    def _build_pk_series(df: pd.DataFrame, primary_keys: List[str]) -> pd.Series:
+        """Build the composite primary key string ("a|b|...") of every row in one vectorized pass."""
+        parts = []
+        for col in primary_keys:
+            values = df[col]
+            # astype(str) matches str() for plain numeric columns; other dtypes are formatted with str() itself
+            parts.append(values.astype(str) if values.dtype.kind in 'iufb' else values.map(str))
+        if not parts:
+            return pd.Series('', index=df.index)
+        return parts[0].str.cat(parts[1:], sep='|') if len(parts) > 1 else parts[0]
+    
+    @staticmethod
+    def _row_hash_keys(df: pd.DataFrame, primary_keys: List[str]) -> pd.Series:
+        """Composite primary key strings used by the row hash path, whatever dtype each frame gave the keys.
+        
+        A nullable integer key column comes back as int64, or as float64 in a frame that holds a NULL,
+        so integral floats are formatted as integers and every NULL as 'None'. The hash chunks and the
+        rows fetched afterwards then agree on the strings.
+        """
+        parts = []
+        for col in primary_keys:
+            values = df[col]
+            nulls = values.isna()
+            if values.dtype.kind == 'f':
+                integral = ~nulls & (values % 1 == 0) & (values.abs() < 2 ** 63)
+                text = values.astype(str).mask(integral, values[integral].astype('int64').astype(str))
+            elif values.dtype.kind in 'iub':
+                text = values.astype(str)
+            else:
+                text = values.map(str)
+            parts.append(text.mask(nulls, 'None'))
+        if not parts:
+            return pd.Series('', index=df.index)
+        return parts[0].str.cat(parts[1:], sep='|') if len(parts) > 1 else parts[0]
+    
+    def _pk_index(self, df: pd.DataFrame, primary_keys: List[str], typed: bool = False,
+                  environment: str = '') -> Tuple[np.ndarray, pd.Index]:
+        """Unique primary keys of a frame as a pd.Index, with the row position each one refers to.
+        
+        With typed, the keys are the raw column values (a MultiIndex for composite keys) instead of
+        "a|b" strings; use _pk_strings to format them. A duplicated key refers to its last row, and
+        duplicates are logged as a warning naming the environment.
+        """
+        if not typed:
+            keys = pd.Index(self._build_pk_series(df, primary_keys).to_numpy())
+        elif len(primary_keys) == 1:
+            keys = pd.Index(df[primary_keys[0]].to_numpy())
         else:
-            pk_values = [str(row[col]) for col in primary_keys]
-            return "|".join(pk_values)
+            keys = pd.MultiIndex.from_arrays([df[col].to_numpy() for col in primary_keys])
+        last = ~keys.duplicated(keep='last')
+        if not last.all():
+            duplicated = keys[~last].unique()
+            self.logger.warning(f"{environment} has {len(duplicated):,} duplicated primary keys "
+                                f"({', '.join(primary_keys)}); only the last row of each is compared. "
+                                f"First ones: {', '.join(self._pk_strings(duplicated[:5]))}")
+        return np.flatnonzero(last), keys[last]
+    
+    @staticmethod
+    def _pk_strings(keys: pd.Index) -> List[str]:
+        """Format keys from _pk_index the way _build_pk_series does."""
+        if isinstance(keys, pd.MultiIndex):
+            return ["|".join(map(str, key)) for key in keys]
+        return keys.astype(str).tolist()
+    
+    @staticmethod
+    def _can_match_typed_keys(dev_df: pd.DataFrame, prod_df: pd.DataFrame,
+                              dev_primary_keys: List[str], prod_primary_keys: List[str]) -> bool:
+        """Whether DEV and PROD keys can be matched on their raw values instead of their string form.
+        
+        Holds when each key column has the same integer/bool dtype on both sides, or holds non-null
+        strings on both sides, so equal values are exactly equal strings.
+        """
+        if len(dev_primary_keys) != len(prod_primary_keys):
+            return False
+        for dev_col, prod_col in zip(dev_primary_keys, prod_primary_keys):
+            dev_values, prod_values = dev_df[dev_col], prod_df[prod_col]
+            if dev_values.dtype != prod_values.dtype:
+                return False
+            kind = dev_values.dtype.kind if isinstance(dev_values.dtype, np.dtype) else None
+            if kind in ('i', 'u', 'b'):
+                continue
+            if kind != 'O' or not all(pd.api.types.infer_dtype(values, skipna=False) in ('string', 'empty')
+                                      for values in (dev_values, prod_values)):
+                return False
+        return True
     
     def compare_values(self, val1: Any, val2: Any) -> bool:
         """Compare two values with appropriate handling for different data types."""
@@ -412,23 +762,79 @@ class DatabaseTableComparator:
         
         return str(val1) == str(val2)
     
-    def get_comparison_columns(self, dev_df: pd.DataFrame, prod_df: pd.DataFrame, 
-                            ignored_columns: List[str], ignore_prod_pks: bool = False, 
-                            ignore_dev_pks: bool = False, prod_primary_keys: List[str] = None, 
-                            dev_primary_keys: List[str] = None) -> Tuple[List[str], List[str]]:
-        """Get columns to compare and columns to ignore."""
-        common_columns = list(set(dev_df.columns) & set(prod_df.columns))
-        ignored_columns_lower = [col.lower() for col in ignored_columns]
+    def _diff_mask(self, dev_frame: pd.DataFrame, prod_frame: pd.DataFrame, columns: List[str]) -> np.ndarray:
+        """Return a rows x columns boolean mask of the cells that differ between two row-aligned frames.
         
-        # Add primary keys to ignored columns if requested
-        if ignore_prod_pks and prod_primary_keys:
-            ignored_columns_lower.extend([pk.lower() for pk in prod_primary_keys])
+        Follows compare_values: nulls on both sides match, numbers match within float_tolerance
+        and anything else is compared as-is (datetimes) or as strings.
+        """
+        mask = np.zeros((len(dev_frame), len(columns)), dtype=bool)
+        compare_values = np.frompyfunc(self.compare_values, 2, 1)
+        for j, col in enumerate(columns):
+            dev_col, prod_col = dev_frame[col], prod_frame[col]
+            # Extension dtypes (nullable ints, categoricals, ...) take the generic path
+            dev_kind = dev_col.dtype.kind if isinstance(dev_col.dtype, np.dtype) else 'O'
+            prod_kind = prod_col.dtype.kind if isinstance(prod_col.dtype, np.dtype) else 'O'
+            
+            if dev_kind in 'iu' and prod_kind in 'iu':
+                mask[:, j] = dev_col.to_numpy() != prod_col.to_numpy()
+            elif dev_kind in 'iuf' and prod_kind in 'iuf':
+                dev_vals = dev_col.to_numpy(dtype=np.float64)
+                prod_vals = prod_col.to_numpy(dtype=np.float64)
+                with np.errstate(invalid='ignore'):
+                    matches = np.abs(dev_vals - prod_vals) <= self.float_tolerance
+                mask[:, j] = ~(matches | (np.isnan(dev_vals) & np.isnan(prod_vals)))
+            elif dev_kind in 'bmM' and dev_col.dtype == prod_col.dtype:
+                both_null = dev_col.isna().to_numpy() & prod_col.isna().to_numpy()
+                mask[:, j] = (dev_col.to_numpy() != prod_col.to_numpy()) & ~both_null
+            else:
+                dev_vals = dev_col.to_numpy(dtype=object)
+                prod_vals = prod_col.to_numpy(dtype=object)
+                if self._holds_strings(dev_vals) and self._holds_strings(prod_vals):
+                    # Plain strings: compare_values boils down to equality with matching nulls
+                    dev_null, prod_null = pd.isna(dev_vals), pd.isna(prod_vals)
+                    differs = np.where(dev_null, None, dev_vals) != np.where(prod_null, None, prod_vals)
+                    mask[:, j] = differs & ~(dev_null & prod_null)
+                else:
+                    mask[:, j] = ~compare_values(dev_vals, prod_vals).astype(bool)
+        return mask
+    
+    @staticmethod
+    def _holds_strings(values: np.ndarray) -> bool:
+        """Whether an object array holds only strings and nulls."""
+        return pd.api.types.infer_dtype(values, skipna=True) in ('string', 'empty')
+    
+    def _differing_cells(self, dev_frame: pd.DataFrame, prod_frame: pd.DataFrame, columns: List[str],
+                         row_keys: Callable[[np.ndarray], List[str]]) -> DifferingRows:
+        """Collect the cells that differ between two row-aligned frames.
+        
+        row_keys maps the positions of the differing rows to the primary keys they are reported under.
+        """
+        rows, cols = np.nonzero(self._diff_mask(dev_frame, prod_frame, columns))
         
-        if ignore_dev_pks and dev_primary_keys:
-            ignored_columns_lower.extend([pk.lower() for pk in dev_primary_keys])
+        # Pull the differing values column by column; rows come out sorted, so each row's cells are contiguous
+        names = np.asarray(columns, dtype=object)[cols]
+        dev_values = np.empty(len(rows), dtype=object)
+        prod_values = np.empty(len(rows), dtype=object)
+        for j in np.unique(cols):
+            in_column = cols == j
+            positions = rows[in_column]
+            dev_values[in_column] = [str(value) for value in dev_frame[columns[j]].iloc[positions].tolist()]
+            prod_values[in_column] = [str(value) for value in prod_frame[columns[j]].iloc[positions].tolist()]
         
-        # Remove duplicates
-        ignored_columns_lower = list(set(ignored_columns_lower))
+        row_starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]]) if len(rows) else np.empty(0, dtype=np.intp)
+        return DifferingRows(row_keys(rows[row_starts]), np.r_[row_starts, len(rows)].tolist(),
+                             names, dev_values, prod_values)
+    
+    def _rows_differ(self, dev_frame: pd.DataFrame, prod_frame: pd.DataFrame, columns: List[str]) -> bool:
+        """Whether any cell differs between two row-aligned frames."""
+        return bool(self._diff_mask(dev_frame, prod_frame, columns).any())
+    
+    def get_comparison_columns(self, dev_df: pd.DataFrame, prod_df: pd.DataFrame,
+                               ignored_columns_lower: FrozenSet[str]) -> Tuple[List[str], List[str]]:
+        """Get columns to compare and columns to ignore (ignored_columns_lower as in TablePairConfig)."""
+        prod_columns = set(prod_df.columns)
+        common_columns = [col for col in dev_df.columns if col in prod_columns]
         
         ignored_columns_found = []
         columns_to_compare = []
@@ -441,9 +847,290 @@ class DatabaseTableComparator:
         
         return columns_to_compare, ignored_columns_found
     
-    def compare_single_pair(self, table_config: TablePairConfig) -> ComparisonResult:
-        """Compare a single table pair."""
+    def _on_both_sides(self, dev_call: Callable[[], Any], prod_call: Callable[[], Any]) -> Tuple[Any, Any]:
+        """Run dev_call on the calling thread and prod_call alongside it on a helper thread."""
+        if not BATCH_CONFIG.get('parallel_environment_queries', True):
+            return dev_call(), prod_call()
+        
+        queries = self.executed_queries
+        
+        def run_prod():
+            # Record into the pair's query log rather than the helper thread's own
+            self.executed_queries = queries
+            return prod_call()
+        
+        prod_future = self._prod_fetch_executor.submit(run_prod)
+        try:
+            dev_value = dev_call()
+        except Exception:
+            # Don't leave the PROD queries running for a pair that already failed
+            wait([prod_future])
+            raise
+        return dev_value, prod_future.result()
+    
+    def _fetch_side(self, config: DatabaseConfig, table_name: str, primary_keys: List[str],
+                    row_filters: Dict[str, List[str]], max_rows: Optional[int],
+                    with_data: bool = True) -> Tuple[int, pd.DataFrame, Optional[pd.DataFrame]]:
+        """Fetch the row count, schema and (unless with_data is False) data of one table of a pair."""
+        with self.borrow(config) as connection:
+            row_count = self.get_row_count(connection, config, table_name, row_filters=row_filters)
+            schema = self.fetch_table_schema(connection, config, table_name)
+            data = None
+            if with_data:
+                data = self.fetch_table_data(connection, config, table_name, primary_keys, max_rows,
+                                             row_filters=row_filters)
+        return row_count, schema, data
+    
+    def _fetch_both_sides(self, table_config: TablePairConfig, max_rows: Optional[int],
+                          early_exit: bool = False) -> Tuple[Tuple, Tuple]:
+        """Fetch both tables of a pair as (row count, schema, data, number of rows compared) per side.
+        
+        When row hashes can be compared in SQL, data only holds the rows whose hash differs
+        (or whose key exists on one side only); otherwise it is the whole sample. With early_exit,
+        no rows are fetched (data is empty) once the row counts or schemas already differ.
+        """
+        dev = (self.dev_config, table_config.dev_table, table_config.dev_primary_keys,
+               table_config.dev_row_filters or {})
+        prod = (self.prod_config, table_config.prod_table, table_config.prod_primary_keys,
+                table_config.prod_row_filters or {})
+        push_down = self._can_push_down_row_hashes(table_config, max_rows)
+        # Look at the counts and schemas before fetching any rows
+        fetch_rows_later = push_down or early_exit
+        
+        (dev_count, dev_schema, dev_df), (prod_count, prod_schema, prod_df) = self._on_both_sides(
+            lambda: self._fetch_side(*dev, max_rows, with_data=not fetch_rows_later),
+            lambda: self._fetch_side(*prod, max_rows, with_data=not fetch_rows_later))
+        
+        if early_exit and (dev_count != prod_count or
+                           self.compare_schemas(dev_schema, prod_schema, table_config.ignored_columns_lower)):
+            self.logger.info(f"{table_config.display_name} differs in row count or schema; skipping the row comparison")
+            return (dev_count, dev_schema, self._empty_frame(dev_schema), 0), \
+                (prod_count, prod_schema, self._empty_frame(prod_schema), 0)
+        
+        if push_down:
+            columns = self._row_hash_columns(dev_schema, prod_schema, table_config.ignored_columns_lower)
+            fetched = None
+            if dev_count == prod_count and self._can_fingerprint_samples(table_config, dev_schema, prod_schema, columns):
+                fetched = self._fetch_identical_samples(dev, prod, columns, max_rows, dev_schema, prod_schema)
+            if columns and not fetched:
+                fetched = self._fetch_differing_rows_sql(dev, prod, columns, max_rows, dev_schema, prod_schema)
+            if fetched:
+                (dev_df, dev_compared), (prod_df, prod_compared) = fetched
+                return (dev_count, dev_schema, dev_df, dev_compared), (prod_count, prod_schema, prod_df, prod_compared)
+        
+        if fetch_rows_later:
+            dev_df, prod_df = self._on_both_sides(
+                lambda: self._fetch_data(*dev, max_rows),
+                lambda: self._fetch_data(*prod, max_rows))
+        
+        return (dev_count, dev_schema, dev_df, len(dev_df)), (prod_count, prod_schema, prod_df, len(prod_df))
+    
+    def _fetch_data(self, config: DatabaseConfig, table_name: str, primary_keys: List[str],
+                    row_filters: Dict[str, List[str]], max_rows: Optional[int]) -> pd.DataFrame:
+        """fetch_table_data on a borrowed connection."""
+        with self.borrow(config) as connection:
+            return self.fetch_table_data(connection, config, table_name, primary_keys, max_rows,
+                                         row_filters=row_filters)
+    
+    @staticmethod
+    def _empty_frame(schema: pd.DataFrame) -> pd.DataFrame:
+        """A frame with no rows and every column of the table, ignored ones included."""
+        # DESCRIBE adds blank and '# ...' rows (and repeats partition columns) after the column list
+        return pd.DataFrame(columns=list(dict.fromkeys(
+            col for col in schema['col_name'] if col and not col.startswith('#'))))
+    
+    @staticmethod
+    def _uses_row_number(primary_keys: List[str]) -> bool:
+        """Whether the key is a single ROW_NUMBER-style column (PK_Account, PK_Customer, ...)."""
+        return len(primary_keys) == 1 and primary_keys[0].startswith('PK_')
+    
+    def _can_push_down_row_hashes(self, table_config: TablePairConfig, max_rows: Optional[int]) -> bool:
+        """Whether rows of this pair can be matched by key and compared by hash in SQL.
+        
+        Position-based comparisons need every row, and a RANDOM sample can't be re-selected reliably.
+        """
+        if not QUERY_CONFIG.get('row_hash_pushdown', False):
+            return False
+        if table_config.ignore_dev_pks or table_config.ignore_prod_pks:
+            return False
+        if self._uses_row_number(table_config.dev_primary_keys) != self._uses_row_number(table_config.prod_primary_keys):
+            return False
+        limited = self._effective_max_rows(max_rows)
+        return not (limited and SAMPLING_CONFIG.get('sampling_method', 'TOP_N') == 'RANDOM')
+    
+    @staticmethod
+    def _row_hash_columns(dev_schema: pd.DataFrame, prod_schema: pd.DataFrame,
+                          ignored_columns_lower: FrozenSet[str]) -> List[str]:
+        """Columns hashed on both sides: those present in both schemas and not ignored."""
+        # DESCRIBE adds blank and '# ...' rows after the column list
+        prod_columns = {col for col in prod_schema['col_name'] if col and not col.startswith('#')}
+        return sorted({col for col in dev_schema['col_name']
+                       if col in prod_columns and col.lower() not in ignored_columns_lower})
+    
+    @staticmethod
+    def _row_hash_expression(columns: List[str]) -> str:
+        """SQL expression hashing the given columns of a row into a BIGINT."""
+        fields = ", ".join(f"'{col}', `{col}`" for col in (c.replace("'", "''").replace("`", "``") for c in columns))
+        return f"xxhash64(to_json(named_struct({fields})))"
+    
+    def fetch_row_hashes(self, connection, config: DatabaseConfig, table_name: str, primary_keys: List[str],
+                         columns: List[str], max_rows: Optional[int],
+                         row_filters: Optional[Dict[str, List[str]]] = None) -> Tuple[Dict[str, int], int]:
+        """Map the primary key of every sampled row to a hash of its compared columns.
+        
+        The result set is streamed in chunks of QUERY_CONFIG['fetch_chunk_rows'] and folded into the map,
+        so it is never held in full. Returns the map and the number of rows read (later duplicates of a key
+        win, as in compare_data).
+        """
+        data_query, parameters, _ = self._build_data_query(config, table_name, primary_keys, max_rows, row_filters)
+        query = (f"SELECT {', '.join(primary_keys)}, {self._row_hash_expression(columns)} AS row_hash_comparison_app "
+                 f"FROM ({data_query}) sampled")
+        
+        row_hashes = {}
+        row_count = 0
+        with connection.cursor() as cursor:
+            self.execute_and_track_query(cursor, query, config.environment, f"Fetch row hashes from table {table_name}",
+                                         parameters)
+            for chunk in self._iter_dataframes(cursor, QUERY_CONFIG.get('fetch_chunk_rows', 131072)):
+                row_hashes.update(zip(self._row_hash_keys(chunk, primary_keys), chunk['row_hash_comparison_app']))
+                row_count += len(chunk)
+        
+        self.logger.info(f"Retrieved {row_count} row hashes from {config.environment}.{table_name}")
+        return row_hashes, row_count
+    
+    def fetch_rows_by_hash(self, connection, config: DatabaseConfig, table_name: str, primary_keys: List[str],
+                           columns: List[str], max_rows: Optional[int], row_hashes: List[int],
+                           row_filters: Optional[Dict[str, List[str]]] = None) -> pd.DataFrame:
+        """Fetch the full sampled rows whose row hash is one of row_hashes."""
+        data_query, parameters, _ = self._build_data_query(config, table_name, primary_keys, max_rows, row_filters)
+        query = (f"SELECT * FROM ({data_query}) sampled "
+                 f"WHERE {self._row_hash_expression(columns)} IN ({', '.join(str(h) for h in row_hashes)}) "
+                 f"ORDER BY {', '.join(primary_keys)} ASC")
+        
+        with connection.cursor() as cursor:
+            self.execute_and_track_query(cursor, query, config.environment,
+                                         f"Fetch {len(row_hashes):,} differing rows from table {table_name}", parameters)
+            df = self._fetch_dataframe(cursor)
+        
+        self.logger.info(f"Retrieved {len(df)} differing rows from {config.environment}.{table_name}")
+        return df
+    
+    def fetch_sample_fingerprint(self, connection, config: DatabaseConfig, table_name: str, primary_keys: List[str],
+                                 columns: List[str], max_rows: Optional[int],
+                                 row_filters: Optional[Dict[str, List[str]]] = None) -> Tuple[int, Any]:
+        """Number of sampled rows and an order-independent fingerprint of their compared columns.
+        
+        The fingerprint is the sum of the row hashes, widened to DECIMAL so that it cannot overflow.
+        """
+        data_query, parameters, _ = self._build_data_query(config, table_name, primary_keys, max_rows, row_filters)
+        query = (f"SELECT COUNT(*) AS row_count, "
+                 f"SUM(CAST({self._row_hash_expression(columns)} AS DECIMAL(38, 0))) AS fingerprint "
+                 f"FROM ({data_query}) sampled")
+        
+        with connection.cursor() as cursor:
+            self.execute_and_track_query(cursor, query, config.environment,
+                                         f"Fingerprint sampled rows of table {table_name}", parameters)
+            row_count, fingerprint = cursor.fetchone()
+        
+        self.logger.info(f"Fingerprinted {row_count} rows of {config.environment}.{table_name}")
+        return row_count, fingerprint
+    
+    def _can_fingerprint_samples(self, table_config: TablePairConfig, dev_schema: pd.DataFrame,
+                                 prod_schema: pd.DataFrame, columns: List[str]) -> bool:
+        """Whether equal sample fingerprints prove that compare_data would find no differences.
+        
+        Both sides must key their rows on the same columns, which have to be part of the hashed
+        columns, and the schemas must match: a sum of row hashes says nothing about which rows pair up.
+        """
+        if not QUERY_CONFIG.get('sample_fingerprint', False) or not columns:
+            return False
+        dev_keys = [pk.lower() for pk in table_config.dev_primary_keys]
+        if self._uses_row_number(table_config.dev_primary_keys) or \
+                dev_keys != [pk.lower() for pk in table_config.prod_primary_keys]:
+            return False
+        if not set(dev_keys) <= {col.lower() for col in columns}:
+            return False
+        return not self.compare_schemas(dev_schema, prod_schema, table_config.ignored_columns_lower)
+    
+    def _fetch_identical_samples(self, dev: Tuple, prod: Tuple, columns: List[str], max_rows: Optional[int],
+                                 dev_schema: pd.DataFrame,
+                                 prod_schema: pd.DataFrame) -> Optional[Tuple[Tuple[pd.DataFrame, int], ...]]:
+        """Check whether both samples are identical from one fingerprint query per side.
+        
+        Returns (no rows, number of rows compared) per side when the fingerprints match, like
+        _fetch_differing_rows_sql finding no differences, or None when the rows have to be compared.
+        """
+        def fingerprint(config, table_name, primary_keys, row_filters):
+            with self.borrow(config) as connection:
+                return self.fetch_sample_fingerprint(connection, config, table_name, primary_keys, columns,
+                                                     max_rows, row_filters=row_filters)
+        
+        try:
+            (dev_rows, dev_fingerprint), (prod_rows, prod_fingerprint) = self._on_both_sides(
+                lambda: fingerprint(*dev), lambda: fingerprint(*prod))
+        except Exception as e:
+            self.logger.warning(f"Sample fingerprint query failed, comparing rows instead: {str(e)}")
+            return None
+        
+        if dev_rows != prod_rows or dev_fingerprint != prod_fingerprint:
+            return None
+        
+        self.logger.info(f"Sample fingerprints match ({dev_rows:,} rows); skipping the row comparison")
+        # Frames with every column of the tables, so the ignored columns are still reported
+        return (self._empty_frame(dev_schema), dev_rows), (self._empty_frame(prod_schema), prod_rows)
+    
+    def _fetch_differing_rows_sql(self, dev: Tuple, prod: Tuple, columns: List[str], max_rows: Optional[int],
+                                  dev_schema: pd.DataFrame,
+                                  prod_schema: pd.DataFrame) -> Optional[Tuple[Tuple[pd.DataFrame, int], ...]]:
+        """Compare row hashes of both sides and download only the rows that differ.
+        
+        Returns (rows, number of rows compared) per side, or None when the full samples should be
+        fetched instead: the hash queries failed or too many rows differ for a hash lookup to pay off.
+        """
+        def hashes(config, table_name, primary_keys, row_filters):
+            with self.borrow(config) as connection:
+                return self.fetch_row_hashes(connection, config, table_name, primary_keys, columns, max_rows,
+                                             row_filters=row_filters)
+        
+        def rows(side, wanted, schema):
+            config, table_name, primary_keys, row_filters = side
+            if not wanted:
+                # All of the table's columns, so compare_data still sees (and reports) the ignored ones
+                return self._empty_frame(schema)
+            with self.borrow(config) as connection:
+                df = self.fetch_rows_by_hash(connection, config, table_name, primary_keys, columns, max_rows,
+                                             sorted(set(wanted.values())), row_filters=row_filters)
+            # Another row may share a wanted hash (same values, different key); keep the wanted keys only
+            return df[self._row_hash_keys(df, primary_keys).isin(set(wanted)).to_numpy()].reset_index(drop=True)
+        
+        try:
+            (dev_map, dev_rows), (prod_map, prod_rows) = self._on_both_sides(lambda: hashes(*dev),
+                                                                             lambda: hashes(*prod))
+        except Exception as e:
+            self.logger.warning(f"Row hash comparison failed, fetching the full samples instead: {str(e)}")
+            return None
+        
+        dev_wanted = {key: row_hash for key, row_hash in dev_map.items() if prod_map.get(key) != row_hash}
+        prod_wanted = {key: row_hash for key, row_hash in prod_map.items() if dev_map.get(key) != row_hash}
+        
+        if len(dev_wanted) + len(prod_wanted) > QUERY_CONFIG.get('max_rows_fetched_by_hash', 5000):
+            self.logger.info(f"{len(dev_wanted) + len(prod_wanted):,} rows differ by hash; fetching the full samples")
+            return None
+        
+        dev_df, prod_df = self._on_both_sides(lambda: rows(dev, dev_wanted, dev_schema),
+                                              lambda: rows(prod, prod_wanted, prod_schema))
+        return (dev_df, dev_rows), (prod_df, prod_rows)
+    
+    def compare_single_pair(self, table_config: TablePairConfig, early_exit: Optional[bool] = None) -> ComparisonResult:
+        """Compare a single table pair.
+        
+        With early_exit only tables_identical is meant to be read: the comparison stops at the first
+        difference found, so the missing/differing row details may be empty or incomplete.
+        Defaults to SAMPLING_CONFIG['detail_level'] == 'identity_only'.
+        """
         start_time = datetime.now()
+        if early_exit is None:
+            early_exit = SAMPLING_CONFIG.get('detail_level', 'full') == 'identity_only'
         
         # Reset query tracking for this comparison
         self.executed_queries = {'DEV': [], 'PROD': []}
@@ -454,52 +1141,19 @@ class DatabaseTableComparator:
             self.logger.info(f"DEV config environment: {self.dev_config.environment}")
             self.logger.info(f"PROD config environment: {self.prod_config.environment}")
             
-            # Get connections
-            dev_conn = self.get_connection(self.dev_config)
-            prod_conn = self.get_connection(self.prod_config)
-            
             # Use user-defined max_rows if available, otherwise use config default
-            from config import SAMPLING_CONFIG
             config_max_rows = SAMPLING_CONFIG['max_rows_for_comparison'] if SAMPLING_CONFIG['enable_row_limit'] else None
             effective_max_rows = config_max_rows
             
             if self.user_max_rows is not None:
                 effective_max_rows = self.user_max_rows if self.user_max_rows > 0 else None
             
-            # Step 1: Compare row counts
-            dev_total_count = self.get_row_count(
-                dev_conn, self.dev_config, table_config.dev_table,
-                row_filters=table_config.dev_row_filters or {}
-            )
-            prod_total_count = self.get_row_count(
-                prod_conn, self.prod_config, table_config.prod_table,
-                row_filters=table_config.prod_row_filters or {}
-            )
-            
-            # Step 2: Compare schemas
-            dev_schema = self.fetch_table_schema(dev_conn, self.dev_config, table_config.dev_table)
-            prod_schema = self.fetch_table_schema(prod_conn, self.prod_config, table_config.prod_table)
-            
-            # Create combined ignored columns list including PKs if requested
-            combined_ignored_columns = list(table_config.ignored_columns)
-            if table_config.ignore_prod_pks:
-                combined_ignored_columns.extend(table_config.prod_primary_keys)
-            if table_config.ignore_dev_pks:
-                combined_ignored_columns.extend(table_config.dev_primary_keys)
+            # Steps 1-3: Fetch row counts, schemas and data from both environments
+            (dev_total_count, dev_schema, dev_df, dev_compared_rows), \
+                (prod_total_count, prod_schema, prod_df, prod_compared_rows) = \
+                self._fetch_both_sides(table_config, effective_max_rows, early_exit)
             
-            schema_differences = self.compare_schemas(dev_schema, prod_schema, combined_ignored_columns)
-            
-            # Step 3: Fetch and compare data - USAR CHAVES PRIMÁRIAS ESPECÍFICAS
-            dev_df = self.fetch_table_data(
-                dev_conn, self.dev_config, table_config.dev_table,
-                table_config.dev_primary_keys, effective_max_rows,
-                row_filters=table_config.dev_row_filters or {}
-            )
-            prod_df = self.fetch_table_data(
-                prod_conn, self.prod_config, table_config.prod_table,
-                table_config.prod_primary_keys, effective_max_rows,
-                row_filters=table_config.prod_row_filters or {}
-            )
+            schema_differences = self.compare_schemas(dev_schema, prod_schema, table_config.ignored_columns_lower)
             
             # Validate primary keys - PASSAR OS PARÂMETROS DE IGNORE
             if not self.validate_primary_keys(dev_df, prod_df, table_config.prod_primary_keys, 
@@ -509,7 +1163,11 @@ class DatabaseTableComparator:
             
             # Step 4: Detailed data comparison
             result = self.compare_data(dev_df, prod_df, schema_differences, dev_total_count, 
-                                    prod_total_count, effective_max_rows, table_config)
+                                    prod_total_count, effective_max_rows, table_config, early_exit)
+            
+            # With row hashes compared in SQL the frames only hold the differing rows
+            result.dev_compared_rows = dev_compared_rows
+            result.prod_compared_rows = prod_compared_rows
             
             duration = (datetime.now() - start_time).total_seconds()
             result.comparison_duration = duration
@@ -548,15 +1206,26 @@ class DatabaseTableComparator:
     
     def compare_data(self, dev_df: pd.DataFrame, prod_df: pd.DataFrame, 
                     schema_differences: List[str], dev_total_rows: int, prod_total_rows: int,
-                    max_rows: int, table_config: TablePairConfig) -> ComparisonResult:
-        """Perform detailed data comparison between DEV and PROD tables."""
+                    max_rows: int, table_config: TablePairConfig, early_exit: bool = False) -> ComparisonResult:
+        """Perform detailed data comparison between DEV and PROD tables.
+        
+        With early_exit the rows are only diffed when nothing else tells the tables apart, and then
+        only to learn whether any row differs (differing_rows stays empty).
+        """
         columns_to_compare, ignored_columns_found = self.get_comparison_columns(
-            dev_df, prod_df, table_config.ignored_columns, 
-            table_config.ignore_prod_pks, table_config.ignore_dev_pks,
-            table_config.prod_primary_keys, table_config.dev_primary_keys)
+            dev_df, prod_df, table_config.ignored_columns_lower)
+        
+        # Set when early_exit found a differing row without listing the differences
+        rows_differ = False
+        
+        if early_exit and (schema_differences or dev_total_rows != prod_total_rows):
+            # O resultado já é conhecido; não comparar as linhas
+            missing_from_dev = []
+            missing_from_prod = []
+            differing_rows = []
         
         # Se ambas as PKs estão sendo ignoradas, usar comparação baseada em posição/conteúdo
-        if table_config.ignore_prod_pks and table_config.ignore_dev_pks:
+        elif table_config.ignore_prod_pks and table_config.ignore_dev_pks:
             self.logger.info("Both primary keys ignored - using position-based comparison")
             
             # IMPORTANTE: Os DataFrames já vêm ordenados pelas PKs do formulário
@@ -574,129 +1243,72 @@ class DatabaseTableComparator:
                 missing_from_prod = [f"row_{i+len(prod_df)+1}" for i in range(len(dev_df) - len(prod_df))]
             
             # Comparar linhas na mesma posição (já ordenadas pelas PKs)
-            for i in range(min_rows):
-                dev_row = dev_df.iloc[i]
-                prod_row = prod_df.iloc[i]
-                
-                differing_columns = []
-                
-                for col in columns_to_compare:
-                    try:
-                        # Safely check if column exists and get values
-                        if col in dev_row.index.tolist() and col in prod_row.index.tolist():
-                            dev_val = dev_row[col]
-                            prod_val = prod_row[col]
-                            if not self.compare_values(dev_val, prod_val):
-                                differing_columns.append({
-                                    'column': col,
-                                    'dev_value': str(dev_val),
-                                    'prod_value': str(prod_val)
-                                })
-                    except (KeyError, IndexError, ValueError):
-                        # Skip column if there's any issue accessing it
-                        continue
-                
-                if differing_columns:
-                    # Mostrar as PKs originais para referência, mesmo que ignoradas na comparação
-                    dev_pk_display = self.create_primary_key(dev_row, table_config.dev_primary_keys)
-                    prod_pk_display = self.create_primary_key(prod_row, table_config.prod_primary_keys)
-                    
-                    differing_rows.append({
-                        'primary_key': f"Position {i+1} [DEV: {dev_pk_display}, PROD: {prod_pk_display}]",
-                        'differences': differing_columns
-                    })
+            dev_aligned = dev_df.iloc[:min_rows]
+            prod_aligned = prod_df.iloc[:min_rows]
+            # Mostrar as PKs originais para referência, mesmo que ignoradas na comparação
+            def position_keys(positions):
+                dev_pks_display = self._build_pk_series(dev_aligned.iloc[positions], table_config.dev_primary_keys)
+                prod_pks_display = self._build_pk_series(prod_aligned.iloc[positions], table_config.prod_primary_keys)
+                return [f"Position {i+1} [DEV: {dev_pk}, PROD: {prod_pk}]"
+                        for i, dev_pk, prod_pk in zip(positions.tolist(), dev_pks_display, prod_pks_display)]
+            
+            if early_exit:
+                # Linhas faltando já bastam para o resultado
+                rows_differ = not (missing_from_dev or missing_from_prod) and \
+                    self._rows_differ(dev_aligned, prod_aligned, columns_to_compare)
+            else:
+                differing_rows = self._differing_cells(dev_aligned, prod_aligned, columns_to_compare, position_keys)
         
         else:
             # Lógica com PKs - os DataFrames já vêm ordenados pelas PKs corretas
             # Verificar se DEV usa ROW_NUMBER como PK (PK_Account, PK_Customer, etc.)
-            dev_uses_row_number = (len(table_config.dev_primary_keys) == 1 and 
-                                table_config.dev_primary_keys[0].startswith('PK_'))
+            dev_uses_row_number = self._uses_row_number(table_config.dev_primary_keys)
             
             # Verificar se PROD usa ROW_NUMBER como PK
-            prod_uses_row_number = (len(table_config.prod_primary_keys) == 1 and 
-                                table_config.prod_primary_keys[0].startswith('PK_'))
-            
-            if dev_uses_row_number and not prod_uses_row_number and not table_config.ignore_dev_pks:
-                # DEV usa ROW_NUMBER, PROD usa colunas reais
-                # Os dados já vêm ordenados, então podemos usar a posição diretamente
-                dev_pk_map = {}
-                prod_pk_map = {}
-                
-                for idx, row in dev_df.iterrows():
-                    row_number = idx + 1  # ROW_NUMBER começa em 1
-                    dev_pk_map[str(row_number)] = idx
-                
-                for idx, row in prod_df.iterrows():
-                    row_number = idx + 1  # ROW_NUMBER começa em 1
-                    prod_pk_map[str(row_number)] = idx
-                
-                dev_pks = set(dev_pk_map.keys())
-                prod_pks = set(prod_pk_map.keys())
-                
-            elif prod_uses_row_number and not dev_uses_row_number and not table_config.ignore_prod_pks:
-                # PROD usa ROW_NUMBER, DEV usa colunas reais
-                # Os dados já vêm ordenados, então podemos usar a posição diretamente
-                dev_pk_map = {}
-                prod_pk_map = {}
-                
-                for idx, row in dev_df.iterrows():
-                    row_number = idx + 1  # ROW_NUMBER começa em 1
-                    dev_pk_map[str(row_number)] = idx
-                
-                for idx, row in prod_df.iterrows():
-                    row_number = idx + 1  # ROW_NUMBER começa em 1
-                    prod_pk_map[str(row_number)] = idx
+            prod_uses_row_number = self._uses_row_number(table_config.prod_primary_keys)
+            
+            if ((dev_uses_row_number and not prod_uses_row_number and not table_config.ignore_dev_pks) or
+                    (prod_uses_row_number and not dev_uses_row_number and not table_config.ignore_prod_pks)):
+                # Um lado usa ROW_NUMBER, o outro colunas reais
+                # Os dados já vêm ordenados, então a chave da linha é a sua posição (ROW_NUMBER começa em 1)
+                # Só o lado mais longo tem linhas sem par: as posições além do fim do outro
+                common_rows = min(len(dev_df), len(prod_df))
+                missing_from_dev = list(map(str, range(common_rows + 1, len(prod_df) + 1)))
+                missing_from_prod = list(map(str, range(common_rows + 1, len(dev_df) + 1)))
                 
-                dev_pks = set(dev_pk_map.keys())
-                prod_pks = set(prod_pk_map.keys())
+                common_pks = pd.RangeIndex(1, common_rows + 1)
+                dev_aligned = dev_df.iloc[:common_rows]
+                prod_aligned = prod_df.iloc[:common_rows]
                 
             else:
                 # Lógica original - usar as PKs diretamente (dados já ordenados)
-                dev_pk_map = {self.create_primary_key(row, table_config.dev_primary_keys): idx 
-                            for idx, row in dev_df.iterrows()}
-                prod_pk_map = {self.create_primary_key(row, table_config.prod_primary_keys): idx 
-                            for idx, row in prod_df.iterrows()}
-                
-                dev_pks = set(dev_pk_map.keys())
-                prod_pks = set(prod_pk_map.keys())
-            
-            # Resto da lógica permanece igual
-            missing_from_dev = list(prod_pks - dev_pks)
-            missing_from_prod = list(dev_pks - prod_pks)
-            
-            common_pks = dev_pks & prod_pks
-            differing_rows = []
-            
-            for pk in common_pks:
-                dev_idx = dev_pk_map[pk]
-                prod_idx = prod_pk_map[pk]
+                # Com PKs duplicadas vale a última linha de cada chave
+                # Chaves com os valores das colunas quando os tipos permitem; viram texto só na saída
+                typed = self._can_match_typed_keys(dev_df, prod_df, table_config.dev_primary_keys,
+                                                   table_config.prod_primary_keys)
+                dev_positions, dev_pks = self._pk_index(dev_df, table_config.dev_primary_keys, typed,
+                                                        self.dev_config.environment)
+                prod_positions, prod_pks = self._pk_index(prod_df, table_config.prod_primary_keys, typed,
+                                                          self.prod_config.environment)
                 
-                dev_row = dev_df.iloc[dev_idx]
-                prod_row = prod_df.iloc[prod_idx]
+                missing_from_dev = self._pk_strings(prod_pks.difference(dev_pks, sort=False))
+                missing_from_prod = self._pk_strings(dev_pks.difference(prod_pks, sort=False))
                 
-                differing_columns = []
-                
-                for col in columns_to_compare:
-                    try:
-                        # Safely check if column exists and get values
-                        if col in dev_row.index.tolist() and col in prod_row.index.tolist():
-                            dev_val = dev_row[col]
-                            prod_val = prod_row[col]
-                            if not self.compare_values(dev_val, prod_val):
-                                differing_columns.append({
-                                    'column': col,
-                                    'dev_value': str(dev_val),
-                                    'prod_value': str(prod_val)
-                                })
-                    except (KeyError, IndexError, ValueError):
-                        # Skip column if there's any issue accessing it
-                        continue
-                
-                if differing_columns:
-                    differing_rows.append({
-                        'primary_key': pk,
-                        'differences': differing_columns
-                    })
+                # Alinhar as linhas comuns (na ordem do DEV) e comparar todas as colunas de uma vez
+                prod_matches = prod_pks.get_indexer(dev_pks)
+                in_prod = prod_matches >= 0
+                common_pks = dev_pks[in_prod]
+                dev_aligned = dev_df.iloc[dev_positions[in_prod]]
+                prod_aligned = prod_df.iloc[prod_positions[prod_matches[in_prod]]]
+            
+            if early_exit:
+                # Linhas faltando já bastam para o resultado
+                rows_differ = not (missing_from_dev or missing_from_prod) and \
+                    self._rows_differ(dev_aligned, prod_aligned, columns_to_compare)
+                differing_rows = []
+            else:
+                differing_rows = self._differing_cells(dev_aligned, prod_aligned, columns_to_compare,
+                                                       lambda positions: self._pk_strings(common_pks[positions]))
         
         was_limited = max_rows and (dev_total_rows > max_rows or prod_total_rows > max_rows)
         
@@ -704,19 +1316,19 @@ class DatabaseTableComparator:
             len(missing_from_dev) == 0 and
             len(missing_from_prod) == 0 and
             len(differing_rows) == 0 and
+            not rows_differ and
             len(schema_differences) == 0 and
             dev_total_rows == prod_total_rows
         )
         
-        from config import SAMPLING_CONFIG
         sampling_method = SAMPLING_CONFIG.get('sampling_method', 'TOP_N')
         
-        # Log final query state
-        self.logger.info(">>> FINAL QUERY STATE before return:")
-        for env, queries in self.executed_queries.items():
-            self.logger.info(f">>> {env}: {len(queries)} queries")
-            for i, q in enumerate(queries):
-                self.logger.info(f">>>   {i+1}. {q['description']}")
+        # Log final query state (one record per comparison)
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(">>> FINAL QUERY STATE before return:\n%s", "\n".join(
+                f">>> {env}: {len(queries)} queries" +
+                "".join(f"\n>>>   {i}. {q['description']}" for i, q in enumerate(queries, 1))
+                for env, queries in self.executed_queries.items()))
         
         return ComparisonResult(
             prod_table=table_config.prod_table,
@@ -747,8 +1359,6 @@ class DatabaseTableComparator:
         start_time = datetime.now()
         self.logger.info(f"Starting batch comparison of {len(table_pairs)} table pairs")
         
-        from config import BATCH_CONFIG
-        
         results = []
         successful_comparisons = 0
         failed_comparisons = 0
@@ -760,8 +1370,20 @@ class DatabaseTableComparator:
                 # Parallel processing (experimental)
                 max_workers = min(BATCH_CONFIG.get('max_concurrent_comparisons', 3), len(table_pairs))
                 
-                with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                    future_to_config = {executor.submit(self.compare_single_pair, config): config 
+                if BATCH_CONFIG.get('parallel_backend', 'thread') == 'process':
+                    # Each worker process builds its own comparator (connections can't be pickled)
+                    executor = ProcessPoolExecutor(
+                        max_workers=max_workers,
+                        initializer=_init_worker_comparator,
+                        initargs=(self.dev_config, self.prod_config, self.float_tolerance,
+                                  self.user_max_rows, dict(self._row_count_cache)))
+                    compare = _compare_pair_in_worker
+                else:
+                    executor = ThreadPoolExecutor(max_workers=max_workers)
+                    compare = self.compare_single_pair
+                
+                with executor:
+                    future_to_config = {executor.submit(compare, config): config 
                                       for config in table_pairs}
                     
                     for future in as_completed(future_to_config):
@@ -812,17 +1434,6 @@ class DatabaseTableComparator:
             
             total_duration = (datetime.now() - start_time).total_seconds()
             
-            # Create summary
-            summary = {
-                'total_pairs': len(table_pairs),
-                'successful_comparisons': successful_comparisons,
-                'failed_comparisons': failed_comparisons,
-                'identical_tables': identical_tables,
-                'different_tables': different_tables,
-                'success_rate': (successful_comparisons / len(table_pairs)) * 100 if table_pairs else 0,
-                'identical_rate': (identical_tables / successful_comparisons) * 100 if successful_comparisons else 0
-            }
-            
             self.logger.info(f"Batch comparison completed in {total_duration:.2f}s")
             self.logger.info(f"Summary: {successful_comparisons}/{len(table_pairs)} successful, "
                            f"{identical_tables} identical, {different_tables} different")
@@ -834,9 +1445,28 @@ class DatabaseTableComparator:
                 identical_tables=identical_tables,
                 different_tables=different_tables,
                 results=results,
-                total_duration=total_duration,
-                summary=summary
+                total_duration=total_duration
             )
             
         finally:
-            self.close_connections()
\ No newline at end of file
+            self.close_connections()
+
+
+# Comparator of a worker process of run_batch_comparison's 'process' backend
+_worker_comparator: Optional[DatabaseTableComparator] = None
+
+
+def _init_worker_comparator(dev_config: DatabaseConfig, prod_config: DatabaseConfig, float_tolerance: float,
+                            user_max_rows: Optional[int], row_counts: Dict[Tuple, int]):
+    """Build the comparator reused by every pair compared in this worker process."""
+    global _worker_comparator
+    _worker_comparator = DatabaseTableComparator(dev_config, prod_config, float_tolerance, user_max_rows)
+    # Row counts prefetched by the parent
+    _worker_comparator._row_count_cache.update(row_counts)
+    # Close the worker's connections when the pool shuts it down
+    multiprocessing.util.Finalize(_worker_comparator, _worker_comparator.close_connections, exitpriority=10)
+
+
+def _compare_pair_in_worker(table_config: TablePairConfig) -> ComparisonResult:
+    """compare_single_pair on the worker process' comparator."""
+    return _worker_comparator.compare_single_pair(table_config)
@@ -3,10 +3,15 @@ Configuration file for Database Table Comparator
 Modify these values according to your environment
 """
 
+import functools
+import hashlib
 import json
 import os
 import re
-from typing import List, Tuple
+import threading
+from typing import List, Optional, Tuple
+
+from storage import write_text_atomic
 
 # DEV Environment Defaults
 DEV_DEFAULTS = {
@@ -39,37 +44,77 @@ def ensure_data_directory():
     """Ensure the data directory exists."""
     os.makedirs(os.path.dirname(CUSTOM_TABLES_FILE), exist_ok=True)
 
+# Parsed tables file, reused while the file's modification time is unchanged.
+# 'etag' is a content hash of the file, used for HTTP conditional requests.
+_tables_cache = {'mtime': None, 'data': None, 'etag': None}
+# Serializes cache refreshes and read-modify-write edits of the tables file across request threads
+_tables_lock = threading.RLock()
+# Separator of ignored column lists, normalized to ' | '
+_PIPE_RE = re.compile(r"\s*\|\s*")
+
+
+def _normalize_pipe(s: str) -> str:
+    """Normalize a newline or pipe separated column list to the spaced pipe format."""
+    return _PIPE_RE.sub(" | ", (s or '').replace('\n', ' | '))
+
+
+def _with_tables_lock(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with _tables_lock:
+            return func(*args, **kwargs)
+    return wrapper
+
+
+@_with_tables_lock
 def load_available_tables() -> List[Tuple[str, str, str, str, str]]:
     """Load available tables from custom file or return defaults."""
     ensure_data_directory()
     
     if os.path.exists(CUSTOM_TABLES_FILE):
         try:
-            with open(CUSTOM_TABLES_FILE, 'r', encoding='utf-8') as f:
-                custom_tables = json.load(f)
-                # Convert list of dicts back to tuples - ATUALIZAR PARA 5 ELEMENTOS
-                return [(table['table_name'], table['display_name'], 
-                        table.get('prod_primary_keys', table.get('primary_keys', '')), 
-                        table.get('dev_primary_keys', table.get('primary_keys', '')),
-                        re.sub(r"\s*\|\s*", " | ", table['ignored_columns'].replace('\n',' | '))) 
-                       for table in custom_tables]
+            mtime = os.stat(CUSTOM_TABLES_FILE).st_mtime_ns
+            if _tables_cache['mtime'] == mtime:
+                return list(_tables_cache['data'])
+            
+            with open(CUSTOM_TABLES_FILE, 'rb') as f:
+                raw = f.read()
+            custom_tables = json.loads(raw.decode('utf-8'))
+            # Convert list of dicts back to tuples - ATUALIZAR PARA 5 ELEMENTOS
+            tables = [(table['table_name'], table['display_name'], 
+                      table.get('prod_primary_keys', table.get('primary_keys', '')), 
+                      table.get('dev_primary_keys', table.get('primary_keys', '')),
+                      _normalize_pipe(table['ignored_columns'])) 
+                     for table in custom_tables]
+            
+            _tables_cache['data'] = tuple(tables)
+            _tables_cache['etag'] = hashlib.blake2b(raw, digest_size=16).hexdigest()
+            _tables_cache['mtime'] = mtime
+            return tables
         except (json.JSONDecodeError, KeyError, FileNotFoundError):
             # If file is corrupted or has wrong format, fall back to defaults
             save_available_tables(DEFAULT_AVAILABLE_TABLES)
-            return DEFAULT_AVAILABLE_TABLES
+            return list(DEFAULT_AVAILABLE_TABLES)
     else:
         # Create default file
         save_available_tables(DEFAULT_AVAILABLE_TABLES)
-        return DEFAULT_AVAILABLE_TABLES
+        return list(DEFAULT_AVAILABLE_TABLES)
 
+@_with_tables_lock
+def load_available_tables_with_etag() -> Tuple[List[Tuple[str, str, str, str, str]], Optional[str]]:
+    """Load available tables with a content hash of the file they came from (None if it could not be read).
+
+    Both are taken under one lock, so the hash always describes the returned tables.
+    """
+    tables = load_available_tables()
+    return tables, (_tables_cache['etag'] if _tables_cache['mtime'] is not None else None)
+
+@_with_tables_lock
 def save_available_tables(tables: List[Tuple[str, str, str, str, str]]):
     """Save available tables to custom file."""
     ensure_data_directory()
     
     # Convert tuples to list of dicts for JSON serialization - ATUALIZAR PARA 5 ELEMENTOS
-    def _normalize_pipe(s: str) -> str:
-        return re.sub(r"\s*\|\s*", " | ", (s or '').replace('\n', ' | '))
-
     tables_data = [
         {
             'table_name': table[0],
@@ -82,11 +127,13 @@ def save_available_tables(tables: List[Tuple[str, str, str, str, str]]):
     ]
     
     try:
-        with open(CUSTOM_TABLES_FILE, 'w', encoding='utf-8') as f:
-            json.dump(tables_data, f, indent=2, ensure_ascii=False)
+        # Skipped when the file already holds these tables; otherwise the next load re-reads it
+        if write_text_atomic(CUSTOM_TABLES_FILE, json.dumps(tables_data, indent=2, ensure_ascii=False)):
+            _tables_cache['mtime'] = None
     except Exception as e:
         print(f"Error saving tables: {e}")
 
+@_with_tables_lock
 def add_table(table_name: str, display_name: str, prod_primary_keys: str, dev_primary_keys: str, ignored_columns: str) -> bool:
     """Add a new table to the available tables list."""
     tables = load_available_tables()
@@ -96,11 +143,12 @@ def add_table(table_name: str, display_name: str, prod_primary_keys: str, dev_pr
         return False
     
     # Normalize ignored columns to spaced pipe format
-    ignored_norm = re.sub(r"\s*\|\s*", " | ", (ignored_columns or '').replace('\n', ' | '))
+    ignored_norm = _normalize_pipe(ignored_columns)
     tables.append((table_name, display_name, prod_primary_keys, dev_primary_keys, ignored_norm))
     save_available_tables(tables)
     return True
 
+@_with_tables_lock
 def update_table(old_table_name: str, table_name: str, display_name: str, 
                 prod_primary_keys: str, dev_primary_keys: str, ignored_columns: str) -> bool:
     """Update an existing table in the available tables list."""
@@ -108,13 +156,14 @@ def update_table(old_table_name: str, table_name: str, display_name: str,
     
     for i, table in enumerate(tables):
         if table[0] == old_table_name:
-            ignored_norm = re.sub(r"\s*\|\s*", " | ", (ignored_columns or '').replace('\n', ' | '))
+            ignored_norm = _normalize_pipe(ignored_columns)
             tables[i] = (table_name, display_name, prod_primary_keys, dev_primary_keys, ignored_norm)
             save_available_tables(tables)
             return True
     
     return False
 
+@_with_tables_lock
 def remove_table(table_name: str) -> bool:
     """Remove a table from the available tables list."""
     tables = load_available_tables()
@@ -128,8 +177,11 @@ def remove_table(table_name: str) -> bool:
     
     return False
 
-# Load available tables at module import
-AVAILABLE_TABLES = load_available_tables()
+def __getattr__(name: str):
+    """Resolve AVAILABLE_TABLES on access, so importing config doesn't read the tables file."""
+    if name == 'AVAILABLE_TABLES':
+        return load_available_tables()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Comparison Settings Defaults
 COMPARISON_DEFAULTS = {
@@ -141,9 +193,14 @@ COMPARISON_DEFAULTS = {
 
 # Application Settings
 APP_CONFIG = {
-    'debug': True,
+    'debug': True,  # True = Flask dev server with auto-reload; False = waitress production server
     'host': '0.0.0.0',
-    'port': 5000
+    'port': 5000,
+    'server_threads': 8,  # Request threads of the waitress server (debug=False)
+    'max_status_streams': None,  # Live status streams open at once, each holding a thread (None = server_threads // 2)
+    'shutdown_grace_seconds': 30,  # How long /shutdown waits for running comparisons to stop
+    'max_stored_results': 64,  # Finished comparisons kept in memory (least recently viewed are dropped first)
+    'results_ttl_seconds': 3600  # How long a finished comparison's results stay available
 }
 
 # Sampling Configuration for Large Tables
@@ -152,13 +209,28 @@ SAMPLING_CONFIG = {
     'enable_row_limit': True,  # Enable row limiting
     'sampling_method': 'LAST_N',  # Options: 'TOP_N', 'LAST_N', 'RANDOM'
     'order_direction': 'DESC',  # DESC for last N rows, ASC for first N rows
+    'random_seed': 12345,  # Seed of the RANDOM sampling order, so repeated runs pick the same rows
+    'detail_level': 'full',  # 'full' lists every difference; 'identity_only' stops at the first one (identical yes/no)
     'allow_user_override': True  # ADICIONAR ESTA LINHA - Allow user to override max rows
 }
 
+# Query Settings
+QUERY_CONFIG = {
+    'row_hash_pushdown': True,  # Compare per-row hashes in SQL first and download only the rows that differ
+    'max_rows_fetched_by_hash': 5000,  # Above this many differing rows, download the full samples instead
+    'sample_fingerprint': True,  # Skip the row comparison when one aggregate hash per side shows identical samples
+    'fetch_chunk_rows': 131072  # Rows read per round-trip when streaming row hashes
+}
+
 # Batch Comparison Settings
 BATCH_CONFIG = {
-    'enable_parallel_processing': False,  # Set to True for parallel processing (experimental)
-    'max_concurrent_comparisons': 3,  # Maximum number of concurrent comparisons
+    'enable_parallel_processing': True,  # Compare several table pairs at once (False = one at a time)
+    'max_concurrent_comparisons': 3,  # Maximum number of concurrent comparisons (bounded by warehouse concurrency)
+    # How run_batch_comparison runs pairs in parallel: 'thread' (default) or 'process'. Processes keep the
+    # comparison of large samples off the GIL, but each costs its own interpreter (tens of MB) and connections
+    'parallel_backend': 'thread',
+    'parallel_environment_queries': True,  # Query DEV and PROD side by side within each pair (False = one after the other)
+    'max_concurrent_runs': None,  # Comparison runs executed at once; later runs wait queued (None = min(8, CPU count))
     'continue_on_error': True,  # Continue with other tables if one fails
     'detailed_logging': True  # Enable detailed logging for batch operations
 }
\ No newline at end of file
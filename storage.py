@@ -2,48 +2,126 @@ from __future__ import annotations
 
 import json
 import os
+import tempfile
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Tuple, Union
 
 try:
     import keyring
+    import keyring.errors
 except Exception:  # pragma: no cover
     keyring = None
 
 
 _SERVICE_NAME = "table-comparator"
+# Both tokens live in one keyring entry (JSON), so loading/saving is one credential-store call
+_TOKENS_KEY = "tokens"
+_LEGACY_TOKEN_KEYS = ("dev_token", "prod_token")
 _SETTINGS_PATH = Path(__file__).resolve().parent / "data" / "local_connection_settings.json"
+# Parsed settings file, reused while the file's modification time is unchanged.
+# The file is hand-editable and clear_saved_credentials.py deletes it, so the mtime is checked on every load.
+_settings_cache = {'mtime': None, 'data': None}
 
 
 def _ensure_data_dir() -> None:
     _SETTINGS_PATH.parent.mkdir(parents=True, exist_ok=True)
 
 
+def write_text_atomic(path: Union[str, Path], text: str) -> bool:
+    """Replace the file at path with text, unless it already holds exactly that text.
+
+    The text goes to a temporary file in the same directory that is then renamed over path,
+    so a crash mid-write never leaves a truncated file behind. Returns whether the file was written.
+    """
+    path = Path(path)
+    try:
+        if path.read_text(encoding="utf-8") == text:
+            return False
+    except (OSError, ValueError):
+        pass
+
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return True
+
+
 def load_connection_settings() -> Dict[str, Any]:
     """Load persisted connection settings.
 
     Non-sensitive values come from a local JSON file.
     Tokens come from the OS keyring (Windows Credential Manager on Windows).
     """
-    settings: Dict[str, Any] = {}
-
-    if _SETTINGS_PATH.exists():
-        try:
-            settings = json.loads(_SETTINGS_PATH.read_text(encoding="utf-8"))
-        except Exception:
-            settings = {}
+    settings = dict(_load_settings_file())
 
     if keyring is not None:
-        dev_token = keyring.get_password(_SERVICE_NAME, "dev_token")
-        prod_token = keyring.get_password(_SERVICE_NAME, "prod_token")
-        if dev_token:
-            settings["dev_token"] = dev_token
-        if prod_token:
-            settings["prod_token"] = prod_token
+        # Read every time: clear_saved_credentials.py changes these entries from another process
+        settings.update(_load_tokens()[0])
 
     return settings
 
 
+def _load_settings_file() -> Dict[str, Any]:
+    """Read the non-sensitive settings file (empty when missing or unreadable)."""
+    global _settings_cache
+    try:
+        mtime = _SETTINGS_PATH.stat().st_mtime_ns
+    except OSError:
+        return {}
+    cached = _settings_cache
+    if cached['mtime'] == mtime:
+        return cached['data']
+
+    try:
+        data = json.loads(_SETTINGS_PATH.read_text(encoding="utf-8"))
+    except Exception:
+        data = {}
+    if not isinstance(data, dict):
+        data = {}
+    # Swapped in with one assignment so concurrent readers never see a half-updated entry
+    _settings_cache = {'mtime': mtime, 'data': data}
+    return data
+
+
+def _load_tokens() -> Tuple[Dict[str, str], bool]:
+    """Read saved tokens from the keyring (single entry, or the older one-entry-per-token layout).
+
+    Also returns whether the single entry exists; False means the tokens still need migrating.
+    """
+    raw = keyring.get_password(_SERVICE_NAME, _TOKENS_KEY)
+    if raw:
+        try:
+            tokens = json.loads(raw)
+        except ValueError:
+            tokens = {}
+        return {name: tokens[name] for name in _LEGACY_TOKEN_KEYS if tokens.get(name)}, True
+
+    tokens = {}
+    for name in _LEGACY_TOKEN_KEYS:
+        token = keyring.get_password(_SERVICE_NAME, name)
+        if token:
+            tokens[name] = token
+    return tokens, False
+
+
+def _delete_keyring_entries(names) -> None:
+    """Delete the given keyring entries, skipping those with nothing stored."""
+    for name in names:
+        try:
+            keyring.delete_password(_SERVICE_NAME, name)
+        except keyring.errors.PasswordDeleteError:
+            # Nothing stored under this name
+            pass
+
+
 def save_connection_settings(settings: Dict[str, Any]) -> None:
     """Persist connection settings safely.
 
@@ -54,7 +132,12 @@ def save_connection_settings(settings: Dict[str, Any]) -> None:
     """
     _ensure_data_dir()
 
-    existing = load_connection_settings()
+    # Same values as load_connection_settings(), plus whether the tokens use the single entry yet
+    existing = dict(_load_settings_file())
+    saved_tokens, tokens_migrated = {}, True
+    if keyring is not None:
+        saved_tokens, tokens_migrated = _load_tokens()
+        existing.update(saved_tokens)
 
     def pick(name: str) -> str:
         val = settings.get(name)
@@ -72,20 +155,20 @@ def save_connection_settings(settings: Dict[str, Any]) -> None:
         "prod_port": pick("prod_port"),
         "prod_database": pick("prod_database"),
     }
-    _SETTINGS_PATH.write_text(json.dumps(file_payload, indent=2, ensure_ascii=False), encoding="utf-8")
+    write_text_atomic(_SETTINGS_PATH, json.dumps(file_payload, indent=2, ensure_ascii=False))
 
     # Persist tokens to keyring
     if keyring is None:
         # No secure store available; do not write tokens to disk.
         return
 
-    dev_token = pick("dev_token")
-    prod_token = pick("prod_token")
-
-    if dev_token:
-        keyring.set_password(_SERVICE_NAME, "dev_token", dev_token)
-    if prod_token:
-        keyring.set_password(_SERVICE_NAME, "prod_token", prod_token)
+    tokens = {name: pick(name) for name in _LEGACY_TOKEN_KEYS}
+    tokens = {name: token for name, token in tokens.items() if token}
+    # Unchanged tokens are only rewritten to move them out of the older per-token entries
+    if tokens and (tokens != saved_tokens or not tokens_migrated):
+        keyring.set_password(_SERVICE_NAME, _TOKENS_KEY, json.dumps(tokens))
+        if not tokens_migrated:
+            _delete_keyring_entries(_LEGACY_TOKEN_KEYS)
 
 
 def clear_connection_settings() -> None:
@@ -99,8 +182,4 @@ def clear_connection_settings() -> None:
     if keyring is None:
         return
 
-    for name in ("dev_token", "prod_token"):
-        try:
-            keyring.delete_password(_SERVICE_NAME, name)
-        except Exception:
-            pass
+    _delete_keyring_entries((_TOKENS_KEY,) + _LEGACY_TOKEN_KEYS)
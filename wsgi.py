@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+"""
+WSGI entry point for running the app under a production server, e.g.:
+
+    waitress-serve --listen=127.0.0.1:5000 --threads=8 wsgi:app
+
+Run a single process: comparison status and results are kept in memory.
+"""
+
+from app import app
+
+__all__ = ['app']